@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import numpy as np
+import pandas as pd
+import re
+import sys
+import time
+
+from scripts.read_data import clean_data, columns
+
+
+# Number of synthetic songs
+num_rows = 100000
+
+
+# Create raw records like the ones returned by load_songs
+def make_raw(num_rows, seed=0):
+    rng = np.random.default_rng(seed)
+
+    titles = np.array(['Song {}'.format(i) for i in range(num_rows)], dtype=object)
+    # Every seventh title carries a recording date
+    live = np.arange(num_rows) % 7 == 0
+    titles[live] = [
+        '{} (Live {}/{}/{})'.format(t, m, d, y) for t, m, d, y in zip(
+            titles[live], rng.integers(1, 13, live.sum()),
+            rng.integers(1, 29, live.sum()), rng.integers(60, 100, live.sum())
+        )
+    ]
+
+    dates = pd.Series(
+        pd.to_datetime('1961-01-01') +
+        pd.to_timedelta(rng.integers(0, 21000, num_rows), unit='D')
+    ).dt.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    dates[np.arange(num_rows) % 11 == 0] = 'None'
+
+    pageviews = rng.integers(0, 100000, num_rows).astype(str).astype(object)
+    pageviews[np.arange(num_rows) % 5 == 0] = 'missing'
+
+    df = pd.DataFrame({
+        'FullTitle': titles + ' by Bob Dylan',
+        'SongTitle': titles,
+        'Artist': 'Bob Dylan',
+        'ReleaseDate': dates,
+        'Pageviews': pageviews,
+        'LyricsState': 'complete',
+        'Lyrics': ' la la la '
+    }, columns=columns)
+
+    return df
+
+# Row by row cleanup as done by read_data before vectorization
+def clean_data_loop(df):
+    df = df.copy()
+    for i in range(len(df)):
+        m = re.search(
+            r'(?P<month>\d+)/(?P<day>\d+)/(?P<year>\d+)', df.iloc[i, 1]
+        )
+        if m:
+            new_date = '/'.join(
+                ['19' + m.group('year'),
+                m.group('month').zfill(2),
+                m.group('day').zfill(2)]
+            )
+            df.iloc[i, 3] = new_date
+
+    df = df[df['ReleaseDate'] != 'None']
+    df = df.replace('missing', 0)
+
+    df['ReleaseDate'] = pd.to_datetime(df['ReleaseDate'])
+    df['Pageviews'] = pd.to_numeric(df['Pageviews'])
+    df['LyricsState'] = df['LyricsState'].astype('category')
+
+    return df
+
+# Time a cleanup function on a fresh copy of the raw data
+def timed(func, raw):
+    t_start = time.perf_counter()
+    df = func(raw.copy())
+
+    return df, time.perf_counter() - t_start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else num_rows
+    raw = make_raw(rows)
+
+    df_vec, t_vec = timed(clean_data, raw)
+    print('clean_data (vectorized): {} rows in {:.3f} s'.format(rows, t_vec))
+
+    df_loop, t_loop = timed(clean_data_loop, raw)
+    print('clean_data (row loop):   {} rows in {:.3f} s'.format(rows, t_loop))
+    print('Speedup: {:.1f}x'.format(t_loop / t_vec))
+
+    # Both variants have to give the same result
+    pd.testing.assert_frame_equal(df_vec, df_loop, check_categorical=False)
+
+
+if __name__ == '__main__':
+    main()
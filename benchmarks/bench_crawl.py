@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import asyncio
+from collections import defaultdict
+import contextlib
+import io
+import numpy as np
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from scripts import async_crawl, collect_lyrics_data as cld, crawl_pipeline
+from scripts.crawl_state import CrawlState
+from scripts.http_cache import ResponseCache
+from scripts.mock_genius import MockGenius
+from scripts.song_archive import archive_dir, archive_entries
+
+
+# Define benchmark parameters
+# Mean latency of the mock server in seconds
+latency = 0.02
+# Shares of responses failing with 503 and 429
+error_rate = 0.01
+rate_limit_rate = 0.01
+# Size of the mock catalog
+num_artists = 10
+songs_per_artist = 20
+# Request rate for the concurrent modes, high enough not to limit them
+bench_rate = 1000
+# Crawl functions whose latency is measured
+timed_functions = [
+    'find_artist_id', 'find_song_ids', 'find_song_meta', 'scrape_song_url',
+    'find_song_data', 'write_song'
+]
+
+# Durations of all calls per crawl function
+timings = defaultdict(list)
+
+
+# Wrap a function to record the duration of every call
+def timed(name, func):
+    def wrapper(*args, **kwargs):
+        t_start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[name].append(time.perf_counter() - t_start)
+
+    return wrapper
+
+# Replace the crawl functions with timed ones in all crawl modules
+def install_timers():
+    wrappers = {name: timed(name, getattr(cld, name)) for name in timed_functions}
+    for module in (cld, async_crawl, crawl_pipeline):
+        for name, wrapper in wrappers.items():
+            if hasattr(module, name):
+                setattr(module, name, wrapper)
+
+# Point the scraper at a fresh output directory and the given cache
+def prepare(out_path, cache):
+    out_path.joinpath('logs').mkdir(parents=True)
+    cld.lyr_path = out_path
+    cld.log_path = out_path.joinpath('logs')
+    cld.state_path = out_path.joinpath('state.sqlite')
+    cld.artist_ids_path = out_path.joinpath('artist_ids.json')
+    cld.cache = cache
+
+# Crawl one song after the other with collect_lyrics_data.main
+def run_sequential(artist_list):
+    cld.t_delay = 0
+    cld.find_artist_list = lambda: artist_list
+    cld.main()
+
+# Crawl with the async crawler
+def run_async(artist_list):
+    state = CrawlState(cld.state_path)
+    asyncio.run(async_crawl.AsyncCrawler(state, rate=bench_rate).crawl(artist_list))
+    state.close()
+
+# Crawl with the staged pipeline
+def run_pipeline(artist_list):
+    state = CrawlState(cld.state_path)
+    crawl_pipeline.CrawlPipeline(state, rate=bench_rate).crawl(artist_list)
+    state.close()
+
+# Run a crawl mode and print songs per second and the latency of every
+# crawl function
+def bench(name, run, artist_list, out_path):
+    timings.clear()
+    t_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run(artist_list)
+    t_total = time.perf_counter() - t_start
+
+    num_songs = len(archive_entries(out_path.joinpath(archive_dir))[0])
+    print('{}: {} songs in {:.2f} s, {:.1f} songs/s'.format(
+        name, num_songs, t_total, num_songs / t_total
+    ))
+    for func in timed_functions:
+        if timings[func]:
+            p50, p99 = np.percentile(timings[func], [50, 99]) * 1000
+            print('    {:<16} {:>5} calls  p50 {:>7.2f} ms  p99 {:>7.2f} ms'.format(
+                func, len(timings[func]), p50, p99
+            ))
+
+
+def main():
+    mock_latency = float(sys.argv[1]) if len(sys.argv) > 1 else latency
+    mock = MockGenius(
+        mock_latency, error_rate, rate_limit_rate,
+        artists=num_artists, songs=songs_per_artist
+    )
+    cld.genius_api_url = mock.start()
+    artist_list = mock.artist_names()
+    install_timers()
+
+    print('Mock server latency {:.0f} ms, {:.0%} errors, {:.0%} rate limited'.format(
+        mock_latency * 1000, error_rate, rate_limit_rate
+    ))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        modes = [
+            ('sequential', run_sequential),
+            ('async', run_async),
+            ('pipeline', run_pipeline)
+        ]
+        for name, run in modes:
+            out_path = tmp_path.joinpath(name)
+            prepare(out_path, ResponseCache(out_path.joinpath('cache'), cld.cache_ttls))
+            bench(name, run, artist_list, out_path)
+
+        # Replay the sequential crawl from its cache without the server
+        out_path = tmp_path.joinpath('replay')
+        prepare(out_path, ResponseCache(
+            tmp_path.joinpath('sequential', 'cache'), cld.cache_ttls, cache_only=True
+        ))
+        bench('cache replay', run_sequential, artist_list, out_path)
+
+    mock.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import numpy as np
+from pathlib import Path
+import sys
+import time
+
+from scripts.lyrics_page import extract_lyrics, extract_lyrics_full
+
+
+# Number of synthetic pages
+num_pages = 50
+# Suffixes of saved pages; .body files are responses from the HTTP cache
+page_suffixes = ('.html', '.body')
+
+
+# Create a page shaped like a Genius song page: large head and footer with
+# scripts and navigation around a lyrics container with annotations
+def make_page(i, rng):
+    nav = ''.join(
+        '<div class="nav-item"><a href="/tag/{0}">Tag {0}</a></div>'.format(j)
+        for j in range(300)
+    )
+    script = '<script>var state = {{"html": "<div class=\\"lyrics\\">{}</div>"}};</script>'.format(
+        'x' * 20000
+    )
+    verses = ''.join(
+        '<p>[Verse {}]<br/>\n{}<br/>\n</p>'.format(v, '<br/>\n'.join(
+            '<a href="/{0}" data-id="{0}">Line {1} &amp; more&nbsp;words &#39;here&#39;</a>'.format(
+                rng.integers(1e6), line
+            ) for line in range(8)
+        )) for v in range(6)
+    )
+    lyrics = '<div class="lyrics">\n<!--sse-->{}<div class="ad"></div><!--/sse-->\n</div>'.format(verses)
+
+    return (
+        '<!DOCTYPE html><html><head><title>Song {}</title>{}<style>.a{{}}</style></head>'
+        '<body><div class="header">{}</div><div class="song_body">'
+        '<div class="column_layout">{}</div></div><div class="footer">{}{}</div>'
+        '</body></html>'
+    ).format(i, script, nav, lyrics, nav, script)
+
+# Load saved pages from a directory or create synthetic ones
+def load_pages(page_dir=None):
+    if page_dir is None:
+        rng = np.random.default_rng(0)
+        return [make_page(i, rng) for i in range(num_pages)]
+
+    pages = (
+        path.read_text(errors='replace')
+        for path in sorted(Path(page_dir).rglob('*'))
+        if path.suffix in page_suffixes
+    )
+
+    # Skip cached API responses and other pages without lyrics
+    return [page for page in pages if 'lyrics' in page and '<div' in page]
+
+# Time an extraction function over all pages
+def timed(func, pages):
+    t_start = time.perf_counter()
+    texts = [func(page) for page in pages]
+
+    return texts, time.perf_counter() - t_start
+
+
+def main():
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    size = sum(len(page) for page in pages) / max(len(pages), 1) / 1000
+
+    texts_fast, t_fast = timed(extract_lyrics, pages)
+    print('extract_lyrics (container only): {} pages of {:.0f} kB in {:.3f} s'.format(
+        len(pages), size, t_fast
+    ))
+
+    texts_full, t_full = timed(extract_lyrics_full, pages)
+    print('extract_lyrics (full page):      {} pages of {:.0f} kB in {:.3f} s'.format(
+        len(pages), size, t_full
+    ))
+    print('Speedup: {:.1f}x'.format(t_full / t_fast))
+
+    # Both variants have to give the same text
+    assert texts_fast == texts_full
+
+
+if __name__ == '__main__':
+    main()
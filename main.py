@@ -3,29 +3,65 @@
 
 # Import statements go here
 from scripts.collect_lyrics_data import lyr_path, proj_dir
-from scripts.read_data import read_data
+from scripts.read_data import (
+    load_data, load_tokens, load_year_counts, load_year_sketches, read_data,
+    sketch_path, update_data
+)
 from io import StringIO
-import pandas as pd
 from pathlib import Path
 import re
 
 from bokeh.io import curdoc
 from bokeh.models.widgets import Tabs
 
+from scripts.corpus_analytics import CorpusAnalytics
 from scripts.tab_overview import tab_overview
 from scripts.tab_word_usage import tab_word_usage
 from scripts.tab_ngrams import tab_ngrams
 
 
-# Define the path to look for the pickled object
-df_path = proj_dir.joinpath('data', 'df.pkl')
+# Define the path to look for the columnar corpus store
+df_path = proj_dir.joinpath('data', 'corpus')
 
-# Check wether the pickled object exists
-try:
-    df = pd.read_pickle(df_path)
-except FileNotFoundError:
-    read_data(lyr_path, df_path)
-    df = pd.read_pickle(df_path)
+# Define the path of the manifest of already parsed lyrics files
+manifest_path = proj_dir.joinpath('data', 'manifest.json')
+
+# Reparse only new, changed or deleted lyrics files before loading the data
+incremental = True
+
+# Estimate the word statistics with fixed size sketches instead of exact
+# counts, for corpora too large to count exactly
+sketch_mode = False
+
+# Language of the lyrics whose stop words are left out of the word
+# statistics, e.g. 'german' for the list of Schlager artists
+lang = 'english'
+
+if incremental:
+    update_data(lyr_path, df_path, manifest_path, sketch=sketch_mode)
+    df = load_data(df_path, lyrics=False)
+else:
+    # Check wether the corpus store and in sketch mode its sketches exist
+    try:
+        df = load_data(df_path, lyrics=False)
+        if sketch_mode and not sketch_path(df_path).exists():
+            raise FileNotFoundError(sketch_path(df_path))
+    except FileNotFoundError:
+        read_data(lyr_path, df_path, sketch=sketch_mode)
+        df = load_data(df_path, lyrics=False)
+
+# Load the tokenized lyrics and the word counts per year shared by all tabs;
+# sketch mode only loads the sketches written at ingest, without the token
+# store, so the word links of the n-grams tab stay empty
+if sketch_mode:
+    tokens = None
+    year_counts = load_year_sketches(df_path)
+else:
+    tokens = load_tokens(df_path)
+    year_counts = load_year_counts(df_path, tokens)
+
+# Word statistics computed once and shared by the tabs and their callbacks
+analytics = CorpusAnalytics(df, tokens, year_counts, lang=lang)
 
 # Print statements for exploratory data analysis
 # print(df.info())
@@ -37,8 +73,8 @@ except FileNotFoundError:
 
 # Create each tab
 tab1 = tab_overview(df, 300, 300, proj_dir)
-tab2 = tab_word_usage(df, 300, 300)
-tab3 = tab_ngrams(df, 300, 300)
+tab2 = tab_word_usage(df, analytics, 300, 300)
+tab3 = tab_ngrams(df, analytics, 300, 300)
 
 # Run a Bokeh server
 curdoc().add_root(Tabs(tabs=[tab1, tab2, tab3]))
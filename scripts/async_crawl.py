@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+
+from scripts.collect_lyrics_data import (
+    concurrency, find_artist_id, find_artist_list, find_song_data,
+    find_song_ids, log_path, max_pages, num_song_ids, prefetch_pages,
+    request_rate, resolve_artist, start_telemetry, state_path, write_log,
+    write_song
+)
+from scripts import telemetry
+from scripts.crawl_state import CrawlState
+from scripts.rate_limiter import RateLimiter
+
+
+# Crawler running the blocking request functions of collect_lyrics_data in a
+# thread pool; every call waits for a free slot and for the rate limiter.
+# Artists are resolved in the thread pool, all other work recorded in the
+# crawl state is looked up in the event loop thread
+class AsyncCrawler:
+    def __init__(self, state, concurrency=concurrency, rate=request_rate):
+        self.state = state
+        self.concurrency = concurrency
+        self.rate = rate
+
+    # Run a blocking function that sends the given number of requests; the
+    # wait for the rate limiter is recorded with the first of them
+    async def call(self, func, *args, requests=1):
+        async with self.semaphore:
+            waited = await self.limiter.acquire_async(requests)
+            loop = asyncio.get_running_loop()
+
+            return await loop.run_in_executor(
+                self.executor, after_wait, waited, func, *args
+            )
+
+    # Fetch the data and lyrics of a song and write them to disk
+    async def crawl_song(self, song_id):
+        if self.state.song_done(song_id):
+            return
+
+        # One request to the API and one for the lyrics page
+        song_data = await self.call(find_song_data, song_id, requests=2)
+        file_name = await self.call(write_song, song_data, song_id, requests=0)
+        self.state.set_song(song_id, file_name)
+
+    # Search an artist ID in a worker thread once the limiter allows the
+    # request
+    def find_artist_id(self, artist):
+        self.limiter.acquire()
+
+        return find_artist_id(artist)
+
+    # Song IDs and next page of a page of an artist, listed only once
+    async def list_page(self, artist_id, page):
+        listed = self.state.page(artist_id, page)
+        if listed is None:
+            listed = await self.call(find_song_ids, artist_id, num_song_ids, page)
+            self.state.add_page(artist_id, page, *listed)
+
+        return listed
+
+    # List the songs of an artist a few pages at a time and crawl them while
+    # the next pages are being listed; work recorded in the crawl state is
+    # skipped
+    async def crawl_artist(self, artist):
+        artist_id = await self.call(
+            resolve_artist, self.state, artist, self.find_artist_id, requests=0
+        )
+        if not artist_id:
+            return
+
+        songs = []
+        page = 1
+        while page is not None and page <= max_pages:
+            window = range(page, min(page + prefetch_pages, max_pages + 1))
+            listed = await asyncio.gather(
+                *(self.list_page(artist_id, page) for page in window)
+            )
+
+            for song_id_list, next_page in listed:
+                songs.extend(
+                    asyncio.ensure_future(self.crawl_song(song_id))
+                    for song_id in song_id_list
+                )
+                if next_page is None:
+                    break
+            page = next_page
+
+        await finish(songs)
+        self.state.finish_artist(artist)
+
+    # Crawl all artists and return the numbers for the log file
+    async def crawl(self, artist_list):
+        # Create the synchronization objects inside the running event loop
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.limiter = RateLimiter(self.rate)
+
+        with ThreadPoolExecutor(self.concurrency) as self.executor:
+            await finish([self.crawl_artist(artist) for artist in artist_list])
+
+        return self.state.summary(artist_list)
+
+
+# Run a function in a worker thread after noting the client wait that
+# delayed it
+def after_wait(seconds, func, *args):
+    telemetry.wait(seconds)
+
+    return func(*args)
+
+# Wait for all tasks and raise the first error afterwards, so that a failed
+# song does not cancel requests in flight whose results are not recorded yet
+async def finish(tasks):
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+# Main function to scrape and store data concurrently
+def main():
+    # Log start time
+    t_start = datetime.datetime.now()
+
+    # Print start info to console
+    print('{}: Starting async scraping process ({} concurrent, {} requests/s)...'.format(
+        t_start.strftime('%Y-%m-%d %H:%M:%S'), concurrency, request_rate
+    ))
+
+    # Record all requests and resume from the state of an interrupted crawl
+    start_telemetry(log_path, t_start)
+    state = CrawlState(state_path)
+    num_artists, num_songs, not_found = asyncio.run(
+        AsyncCrawler(state).crawl(find_artist_list())
+    )
+    state.close()
+
+    # Log end time
+    t_end = datetime.datetime.now()
+
+    # Write log file
+    write_log(log_path, t_start, t_end, num_artists, num_songs, not_found,
+              telemetry.stop())
+
+    # Print end info to console
+    print('{}: Success! Scraping finished.'.format(t_end.strftime('%Y-%m-%d %H:%M:%S')))
+
+
+if __name__ == '__main__':
+    main()
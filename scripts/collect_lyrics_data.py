@@ -2,46 +2,142 @@
 
 
 # Import statements go here
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 import configparser
 import datetime
+import json
+import os
 from pathlib import Path
 import re
-import requests
+import threading
 import time
 
+from scripts import http_cache, telemetry
+from scripts.crawl_state import CrawlState
+from scripts.lyrics_page import extract_lyrics
+from scripts.song_archive import SongArchive, archive_dir
+
 
 # Define scraping parameters
 # Number of song IDs returned per page
 num_song_ids = 10
 # Maximum number of pages queried per artist ID
 max_pages = 1
+# Number of pages of an artist listed at the same time; the number of pages
+# is not known beforehand, so up to this many pages past the last one are
+# requested in vain
+prefetch_pages = 4
 # Delay between saving song data and the next song data request in seconds
 t_delay = 2
+# Number of songs fetched at the same time in the async crawl mode
+concurrency = 8
+# Maximum rate of requests per second in the async crawl mode
+request_rate = 5
 # Path of project directory
 proj_dir = Path(__file__).resolve().parents[1]
 # Path for saving lyrics data
 lyr_path = proj_dir.joinpath('data', 'lyrics')
+# Append songs to the sharded archive in the lyrics directory instead of
+# writing one file per song
+archive_songs = True
 # Path for saving log files
 log_path = proj_dir.joinpath('data', 'logs')
+# Path of the artist IDs found in earlier crawls
+artist_ids_path = proj_dir.joinpath('data', 'artist_ids.json')
+# Path of the crawl state used to resume an interrupted crawl; delete it to
+# start a new crawl from scratch
+state_path = proj_dir.joinpath('data', 'crawl_state.sqlite')
+# Path for caching the responses of all requests
+cache_path = proj_dir.joinpath('data', 'http_cache')
+# Replay a crawl from the cache only, without sending any requests
+cache_only = False
+# Time to live of cached responses per URL pattern in seconds; song lists
+# change with popularity, song pages and lyrics hardly ever
+cache_ttls = [
+    (r'api\.genius\.com/search', 7 * 24 * 60 * 60),
+    (r'api\.genius\.com/artists/\d+/songs', 24 * 60 * 60),
+    (r'api\.genius\.com/songs/\d+', 7 * 24 * 60 * 60),
+    (r'genius\.com/', 30 * 24 * 60 * 60)
+]
+# Endpoint names of the request telemetry per URL pattern
+endpoint_patterns = [
+    (r'/search', 'search'),
+    (r'/artists/\d+/songs', 'artist_songs'),
+    (r'/songs/\d+', 'songs'),
+    (r'lyrics', 'lyrics')
+]
 # Path of config file
 config_file = proj_dir.joinpath('config', 'config.ini')
 
-# Import Client Access Token for Genius API from config file
+# Import Client Access Token for Genius API from config file; without a
+# config file the requests are sent unauthenticated, e.g. to a mock server
 config = configparser.ConfigParser()
 config.read(config_file)
-genius_access_token = config['DEFAULT']['CLIENT_ACCESS_TOKEN']
+genius_access_token = config['DEFAULT'].get('CLIENT_ACCESS_TOKEN', '')
+
+# Field names of the song records written to the lyrics files
+record_fields = [
+    'FullTitle',
+    'SongTitle',
+    'Artist',
+    'ReleaseDate',
+    'Pageviews',
+    'LyricsState',
+    'Lyrics'
+]
 
 # Genius API configuration
-genius_api_url = 'https://api.genius.com'
+genius_api_url = config['DEFAULT'].get('API_URL', 'https://api.genius.com')
 genius_api_headers = {'Authorization': 'Bearer ' + genius_access_token}
 
+# Response cache shared by all requests
+cache = http_cache.ResponseCache(cache_path, cache_ttls, cache_only)
+
+# Archive writer shared by all threads
+archive_writer = None
+archive_lock = threading.Lock()
+
+# Path and artist IDs by name as loaded from artist_ids_path
+artist_ids = None
+artist_ids_lock = threading.Lock()
+
+
+# Artist IDs found in earlier crawls, loaded on first use
+def known_artist_ids():
+    global artist_ids
+
+    with artist_ids_lock:
+        if artist_ids is None or artist_ids[0] != artist_ids_path:
+            try:
+                with open(artist_ids_path) as file:
+                    artist_ids = (artist_ids_path, json.load(file))
+            except FileNotFoundError:
+                artist_ids = (artist_ids_path, {})
+
+        return artist_ids[1]
 
-# Find Genius artist ID from given name
+# Store a newly found artist ID with all known ones
+def remember_artist_id(artist_name, artist_id):
+    known = known_artist_ids()
+
+    with artist_ids_lock:
+        known[artist_name] = artist_id
+        artist_ids_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = artist_ids_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(known, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, artist_ids_path)
+
+# Find Genius artist ID from given name; IDs found before are taken from
+# the stored ones without a search request
 def find_artist_id(artist_name):
+    known = known_artist_ids()
+    if artist_name in known:
+        return known[artist_name]
+
     url = genius_api_url + '/search'
     query = {'q': artist_name}
-    response = requests.get(url, data=query, headers=genius_api_headers).json()
+    response = cache.get(url, data=query, headers=genius_api_headers).json()
     artist_id = None
 
     for hit in response['response']['hits']:
@@ -49,15 +145,31 @@ def find_artist_id(artist_name):
             artist_id = hit['result']['primary_artist']['id']
             break
 
+    if artist_id:
+        remember_artist_id(artist_name, artist_id)
+
     return artist_id
 
+# Artist ID of an artist to crawl, from the crawl state or searched with
+# search and recorded; None for artists that were crawled completely before
+# or that were not found
+def resolve_artist(state, artist_name, search=find_artist_id):
+    resolved = state.artist(artist_name)
+    if resolved is None:
+        artist_id = search(artist_name)
+        state.set_artist(artist_name, artist_id)
+        return artist_id
+
+    artist_id, done = resolved
+    return None if done else artist_id
+
 # Find song IDs where artist ID is listed as primary artist
 def find_song_ids(artist_id, num_song_ids, page):
-    url = 'https://api.genius.com/artists/' + str(artist_id) + '/songs'
+    url = genius_api_url + '/artists/' + str(artist_id) + '/songs'
     # Payload defines sorting of songs and number listed
     payload = {'sort': 'popularity', 'per_page': num_song_ids, 'page': page}
-    response = requests.get(url, headers=genius_api_headers,
-                            params=payload).json()
+    response = cache.get(url, headers=genius_api_headers,
+                         params=payload).json()
 
     # Initiate an empty list to store all song IDs
     song_id_list = []
@@ -71,18 +183,41 @@ def find_song_ids(artist_id, num_song_ids, page):
 
     return song_id_list, next_page
 
+# Yield the number and song IDs of all pages of an artist up to max_pages;
+# fetch(page) returns the song IDs and next page like find_song_ids and is
+# called for the next few pages at the same time
+def iter_pages(fetch, max_pages, ahead=prefetch_pages):
+    with ThreadPoolExecutor(ahead) as pool:
+        page = 1
+        while page <= max_pages:
+            window = range(page, min(page + ahead, max_pages + 1))
+            for page, (song_id_list, next_page) in zip(window, pool.map(fetch, window)):
+                yield page, song_id_list
+                if next_page is None:
+                    return
+            page += 1
+
+# Song IDs and next page of a page of an artist, listed once and then taken
+# from the crawl state
+def list_page(state, artist_id, page):
+    listed = state.page(artist_id, page)
+    if listed is None:
+        listed = find_song_ids(artist_id, num_song_ids, page)
+        state.add_page(artist_id, page, *listed)
+
+    return listed
+
 # Scrape song lyrics from web pages by given url
 def scrape_song_url(url):
-    page = requests.get(url)
-    html = BeautifulSoup(page.text, 'html.parser')
-    lyrics = html.find('div', class_='lyrics').get_text()
+    page = cache.get(url)
+    lyrics = extract_lyrics(page.text)
 
     return lyrics
 
-# Query song IDs for data and lyrics
-def find_song_data(song_id):
-    url = 'https://api.genius.com/songs/' + str(song_id)
-    response = requests.get(url, headers=genius_api_headers).json()
+# Query song ID for song data and the url of the lyrics page
+def find_song_meta(song_id):
+    url = genius_api_url + '/songs/' + str(song_id)
+    response = cache.get(url, headers=genius_api_headers).json()
 
     full_title = response['response']['song']['full_title']
     title = response['response']['song']['title']
@@ -103,9 +238,16 @@ def find_song_data(song_id):
     except KeyError:
         lyr_state = 'missing'
 
-    lyrics = scrape_song_url(response['response']['song']['url'])
+    song_meta = full_title, title, ar_name, rel_date, pageviews, lyr_state
 
-    return full_title, title, ar_name, rel_date, pageviews, lyr_state, lyrics
+    return song_meta, response['response']['song']['url']
+
+# Query song IDs for data and lyrics
+def find_song_data(song_id):
+    song_meta, url = find_song_meta(song_id)
+    lyrics = scrape_song_url(url)
+
+    return song_meta + (lyrics,)
 
 # Find backslashes in a string and replace them with a space
 def del_slash(input):
@@ -113,8 +255,60 @@ def del_slash(input):
 
     return output
 
-# Write log file with relevant data for scraping process
-def write_log(log_path, t_start, t_end, num_artists, num_songs, not_found):
+# Archive writer of the lyrics directory, opened on first use
+def song_archive():
+    global archive_writer
+
+    archive_path = lyr_path.joinpath(archive_dir)
+    with archive_lock:
+        if archive_writer is None or archive_writer.archive_path != archive_path:
+            archive_writer = SongArchive(archive_path)
+
+        return archive_writer
+
+# Write song data as a JSON record on a single line, either appended to the
+# archive under the song ID or into a file of its own
+def write_song(song_data, song_id):
+    record = dict(zip(record_fields, song_data))
+    if archive_songs:
+        return song_archive().append(str(song_id), record)
+
+    file_name = lyr_path.joinpath('{}_{}.jsonl'.format(
+        del_slash(record['Artist']), del_slash(record['SongTitle'])
+    ))
+
+    with open(file_name, 'w') as file:
+        print(json.dumps(record, ensure_ascii=False), file=file)
+
+    return file_name
+
+# Collect the names of all artists to scrape
+def find_artist_list():
+    # Parse Wikipedia page for artist names
+    # url = 'https://de.wikipedia.org/wiki/Liste_deutschsprachiger_Schlagermusiker'
+    # page = requests.get(url)
+    # soup = BeautifulSoup(page.text, 'html.parser')
+    # list_items = soup.find_all('li')
+    # pattern = re.compile(r'\s(?!&)\W.*', re.U)
+    # artist_list = [re.sub(pattern, '', a.get_text()) for a in list_items][0:488]
+
+    # Input artist list directly
+    artist_list = ['Sia']
+
+    return artist_list
+
+# Start recording every request of a crawl into a JSON lines file next to
+# the log file
+def start_telemetry(log_path, t_start):
+    return telemetry.start(
+        log_path.joinpath('requests_{}.jsonl'.format(t_start.strftime('%Y_%m_%d_%H%M%S'))),
+        endpoint_patterns
+    )
+
+# Write log file with relevant data for scraping process and the summary of
+# the request telemetry
+def write_log(log_path, t_start, t_end, num_artists, num_songs, not_found,
+              summary=''):
     log_name = (log_path.joinpath('log_{}.txt'.
                 format(t_start.strftime('%Y_%m_%d_%H%M%S'))))
     with open(log_name, 'w') as file:
@@ -125,76 +319,65 @@ def write_log(log_path, t_start, t_end, num_artists, num_songs, not_found):
             'Delay timer set to [seconds]: ' + str(t_delay),
             'Number of artists: ' + str(num_artists),
             'Number of songs: ' + str(num_songs),
-            'Average no. of songs per artist: ' + str(num_songs/num_artists),
-            'Time per song: ' + str((t_end - t_start)/num_songs),
+            'Average no. of songs per artist: ' +
+            (str(num_songs/num_artists) if num_artists else 'n/a'),
+            'Time per song: ' +
+            (str((t_end - t_start)/num_songs) if num_songs else 'n/a'),
             'Artists not found: ' + str(not_found),
             sep=';\n',
             file=file
         )
+        if summary:
+            print('\n' + summary, file=file)
 
 
 # Main function to scrape and store data
 def main():
 
-    # Initialize variables for logging
+    # Log start time, record all requests and open the state of the crawl
+    # to resume
     t_start = datetime.datetime.now()
-    num_artists = 0
-    num_songs = 0
-    not_found = []
+    start_telemetry(log_path, t_start)
+    state = CrawlState(state_path)
 
     # Print start info to console
     print('{}: Starting scraping process...'.format(t_start.strftime('%Y-%m-%d %H:%M:%S')))
 
-    # Parse Wikipedia page for artist names
-    # url = 'https://de.wikipedia.org/wiki/Liste_deutschsprachiger_Schlagermusiker'
-    # page = requests.get(url)
-    # soup = BeautifulSoup(page.text, 'html.parser')
-    # list_items = soup.find_all('li')
-    # pattern = re.compile(r'\s(?!&)\W.*', re.U)
-    # artist_list = [re.sub(pattern, '', a.get_text()) for a in list_items][0:488]
-
-    # Input artist list directly
-    artist_list = ['Sia']
+    # Collect the names of all artists to scrape
+    artist_list = find_artist_list()
 
     for artist in artist_list:
         # print('Scraping artist {} of {}'.format(num_artists+len(not_found)+1, len(artist_list)), end='\r')
 
-        artist_id = find_artist_id(artist)
-        if artist_id:
-            page = 1
-            while page is not None and page <= max_pages:
-                song_id_list, page = find_song_ids(artist_id, num_song_ids, page)
-
-                for song_id in song_id_list:
-                    print('Scraping song ID {} on page {}...'.format(song_id, page - 1), end='\r')
-                    full_title, title, ar_name, rel_date, pageviews, lyr_state, lyrics = find_song_data(song_id)
-
-                    file_name = lyr_path.joinpath('{}_{}.txt'.format(del_slash(ar_name), del_slash(title)))
-                    with open(file_name, 'w') as file:
-                        print(
-                            full_title,
-                            title,
-                            ar_name,
-                            rel_date,
-                            pageviews,
-                            lyr_state,
-                            lyrics,
-                            sep=';##\n',
-                            file=file
-                        )
-                    num_songs += 1
-                    time.sleep(t_delay)
-
-            num_artists += 1
-
-        else:
-            not_found.append(artist)
+        # Skip artists that were crawled completely before or not found
+        artist_id = resolve_artist(state, artist)
+        if not artist_id:
+            continue
+
+        # List every page only once and the next pages while scraping
+        pages = iter_pages(lambda page: list_page(state, artist_id, page), max_pages)
+        for page, song_id_list in pages:
+            for song_id in song_id_list:
+                if state.song_done(song_id):
+                    continue
+
+                print('Scraping song ID {} on page {}...'.format(song_id, page), end='\r')
+                state.set_song(song_id, write_song(find_song_data(song_id), song_id))
+                telemetry.wait(t_delay)
+                time.sleep(t_delay)
+
+        state.finish_artist(artist)
+
+    # Numbers over the whole crawl including earlier runs
+    num_artists, num_songs, not_found = state.summary(artist_list)
+    state.close()
 
     # Log end time
     t_end = datetime.datetime.now()
 
     # Write log file
-    write_log(log_path, t_start, t_end, num_artists, num_songs, not_found)
+    write_log(log_path, t_start, t_end, num_artists, num_songs, not_found,
+              telemetry.stop())
 
     # Print end info to console
     print('{}: Success! Scraping finished.'.format(t_end.strftime('%Y-%m-%d %H:%M:%S')))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from collections import OrderedDict
+import numpy as np
+import threading
+
+from scripts.tokenizer import stop_words
+
+
+# Define analytics parameters
+# Maximum number of results kept before the least recently used ones are
+# evicted
+cache_size = 128
+
+
+# Word statistics of the corpus shared by all tabs and their callbacks.
+# Results are memoized per corpus version and language in a bounded LRU
+# cache; the tables of all years are prepared at once, so switching the
+# year is a lookup in a memoized result. Loading a new corpus starts a new
+# version, so results of the old one are never returned and are evicted
+# over time. The language selects the stop words left out of the word
+# statistics
+class CorpusAnalytics:
+    def __init__(self, df, tokens, year_counts, cache_size=cache_size,
+                 lang='english'):
+        self.cache_size = cache_size
+        self.lang = lang
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = 0
+        self.stats = {'hits': 0, 'misses': 0}
+        self.load(df, tokens, year_counts)
+
+    # Switch to a new corpus
+    def load(self, df, tokens, year_counts):
+        with self.lock:
+            self.df = df
+            self.tokens = tokens
+            self.year_counts = year_counts
+            self.version += 1
+
+    # Return the memoized result of func for a key, computing it on a miss;
+    # func runs outside the lock, so a slow computation does not block
+    # lookups of other results. A result is only stored if no other corpus
+    # was loaded while it was computed
+    def cached(self, name, lang, func, *args):
+        with self.lock:
+            version = self.version
+            key = (version, lang, name) + args
+            if key in self.results:
+                self.results.move_to_end(key)
+                self.stats['hits'] += 1
+                return self.results[key]
+            self.stats['misses'] += 1
+
+        result = func(*args)
+
+        with self.lock:
+            if self.version == version:
+                self.results[key] = result
+                self.results.move_to_end(key)
+                while len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+
+        return result
+
+    # Stop words of a language, by default the one of the analytics
+    def stop_words(self, lang=None):
+        return stop_words(lang or self.lang)
+
+    # All years in the dataset in order
+    def years(self):
+        return self.cached('years', None, lambda: all_years(self.df))
+
+    # Number of individual words used in all songs, estimated in sketch mode
+    def unique_words(self):
+        return self.cached(
+            'unique_words', None,
+            lambda: self.year_counts.unique_words()
+        )
+
+    # Word counts per year without the stop words of a language
+    def word_counts(self, lang=None):
+        lang = lang or self.lang
+        return self.cached(
+            'word_counts', lang,
+            lambda: self.year_counts.exclude(self.stop_words(lang))
+        )
+
+    # List of all words of all songs in order without the stop words of a
+    # language; not memoized, as it holds a copy of the whole corpus. Empty
+    # without a token store, e.g. in sketch mode
+    def words(self, lang=None):
+        if self.tokens is None:
+            return []
+
+        return self.tokens.words(exclude=self.stop_words(lang))
+
+    # Most common words and the columns of the table of their shares in every
+    # year for 'overall' and every single year, all prepared at once
+    def top_freq_tables(self, number, lang=None):
+        lang = lang or self.lang
+        return self.cached(
+            'top_freq_tables', lang,
+            lambda number: top_freq_tables(self.word_counts(lang), number),
+            number
+        )
+
+    # Most common words for a year or 'overall' and the columns of the long
+    # format table of their shares in every year; taken from the prepared
+    # tables, so switching the year is a lookup. Years without any counted
+    # words get an empty table
+    def top_freq_years(self, ref_year, number, lang=None):
+        tables = self.top_freq_tables(number, lang)
+        if ref_year not in tables:
+            return {'Year': [], 'Word': [], 'Frequency': np.zeros(0)}, ()
+
+        return tables[ref_year]
+
+    # Share of a word in percent of all words for every year
+    def share(self, word, lang=None):
+        lang = lang or self.lang
+        return self.cached(
+            'share', lang,
+            lambda word: self.word_counts(lang).share(word), word
+        )
+
+
+# Find all release years in dataset in one vectorized pass, as strings like
+# the years of the word counts
+def all_years(df):
+    years = df['ReleaseDate'].dt.year.dropna().unique().astype(np.int64)
+
+    return [str(year) for year in np.sort(years)]
+
+# Find the top words for all years and overall and the columns of the tables
+# of their shares over all years with a word and year for each row; the
+# shares of all top words are taken from the counts in a single pass
+def top_freq_tables(year_counts, number):
+    refs = ['overall'] + year_counts.years
+    top = {
+        ref: tuple(word for word, count in year_counts.top_words(ref, number))
+        for ref in refs
+    }
+
+    # Shares of every word that is among the top words of any year
+    used = sorted(set().union(*top.values()))
+    shares = year_counts.column_shares(used)
+    position = {word: i for i, word in enumerate(used)}
+
+    tables = {}
+    for ref, words in top.items():
+        freq = shares[:, [position[word] for word in words]]
+        tables[ref] = {
+            'Year': np.repeat(year_counts.years, len(words)),
+            'Word': np.tile(np.array(words, dtype=object), len(year_counts.years)),
+            'Frequency': freq.ravel()
+        }, words
+
+    return tables
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import shutil
+
+
+# Columns holding free text, stored as one UTF-8 buffer plus offsets
+text_columns = ['FullTitle', 'SongTitle', 'Artist', 'Lyrics']
+# Columns holding categorical data, stored as integer codes
+category_columns = ['LyricsState']
+# Name of the file describing the layout of the store
+schema_name = 'schema.json'
+
+
+# Sequence of strings backed by a memory-mapped UTF-8 buffer and an offsets
+# array; single entries are only decoded when they are accessed
+class TextColumn:
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+
+        return self.buffer[start:end].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # Decode all entries at once into a Series
+    def to_series(self, index=None, name=None):
+        data = self.buffer.tobytes()
+        offsets = self.offsets.tolist()
+        values = [
+            data[start:end].decode('utf-8')
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+        return pd.Series(values, index=index, name=name, dtype=object)
+
+
+# Chunked writer for a column of numbers: chunks are appended to a raw file,
+# which is turned into a .npy file when the writer is closed. With widen, a
+# chunk of a wider type, e.g. floats after ints, converts the whole column
+# instead of being cast to the type of the first chunk
+class ArrayWriter:
+    def __init__(self, store_path, name, dtype, widen=False):
+        self.path = store_path.joinpath(name + '.npy')
+        self.raw_path = store_path.joinpath(name + '.raw')
+        self.dtype = np.dtype(dtype)
+        self.widen = widen
+        self.file = open(self.raw_path, 'wb')
+
+    def append(self, values):
+        values = np.asarray(values)
+        if self.widen and np.result_type(self.dtype, values.dtype) != self.dtype:
+            self.convert(np.result_type(self.dtype, values.dtype))
+
+        values.astype(self.dtype, copy=False).tofile(self.file)
+
+    # Rewrite the values written so far with a wider type
+    def convert(self, dtype):
+        self.file.close()
+        values = np.fromfile(self.raw_path, dtype=self.dtype).astype(dtype)
+        self.dtype = dtype
+        self.file = open(self.raw_path, 'wb')
+        values.tofile(self.file)
+
+    def close(self):
+        self.file.close()
+        np.save(self.path, memmap(self.raw_path, self.dtype))
+        self.raw_path.unlink()
+
+
+# Chunked writer for a column of strings as a byte buffer plus offsets
+class TextWriter:
+    def __init__(self, store_path, name):
+        self.file = open(store_path.joinpath(name + '.bin'), 'wb')
+        self.offsets = ArrayWriter(store_path, name + '.off', np.int64)
+        self.offsets.append([0])
+        self.end = 0
+
+    def append(self, values):
+        encoded = [str(value).encode('utf-8') for value in values]
+        ends = self.end + np.cumsum([len(value) for value in encoded], dtype=np.int64)
+
+        self.file.write(b''.join(encoded))
+        self.offsets.append(ends)
+        if len(ends):
+            self.end = int(ends[-1])
+
+    def close(self):
+        self.file.close()
+        self.offsets.close()
+
+
+# Map a file as a read-only array, which is not possible for empty files
+def memmap(path, dtype):
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode='r')
+
+# Write a column of strings as a byte buffer plus offsets
+def write_text(values, store_path, name):
+    writer = TextWriter(store_path, name)
+    writer.append(values)
+    writer.close()
+
+# Open a column of strings without decoding it
+def read_text(store_path, name):
+    store_path = Path(store_path)
+
+    return TextColumn(
+        memmap(store_path.joinpath(name + '.bin'), np.uint8),
+        np.load(store_path.joinpath(name + '.off.npy'), mmap_mode='r')
+    )
+
+# Create an empty temporary directory next to the store to write into, so
+# that readers never see a half written store
+def begin_store(store_path):
+    tmp_path = store_path.with_name(store_path.name + '.tmp')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    return tmp_path
+
+# Swap the completely written temporary directory in place of the store
+def commit_store(tmp_path, store_path):
+    old_path = store_path.with_name(store_path.name + '.old')
+    shutil.rmtree(old_path, ignore_errors=True)
+    if store_path.exists():
+        store_path.rename(old_path)
+    tmp_path.rename(store_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+# Chunked writer for the store: every appended DataFrame is added to the
+# column files, so only one chunk of songs has to be held in memory. If no
+# chunk arrives, the empty DataFrame gives the columns of the empty store
+class StoreWriter:
+    def __init__(self, store_path, empty=None):
+        self.store_path = Path(store_path)
+        self.tmp_path = begin_store(self.store_path)
+        self.empty = empty if empty is not None else pd.DataFrame()
+        self.schema = None
+        self.writers = {}
+        # Codes of the categories in order of first appearance
+        self.categories = {}
+
+    # Set up one writer per column from the first chunk
+    def open_columns(self, df):
+        self.schema = {'rows': 0, 'index': df.index.name, 'columns': []}
+        self.writers['_index'] = TextWriter(self.tmp_path, '_index')
+
+        for name in df.columns:
+            if name in text_columns:
+                self.writers[name] = TextWriter(self.tmp_path, name)
+                column = {'name': name, 'kind': 'text'}
+            elif name in category_columns:
+                self.writers[name] = ArrayWriter(self.tmp_path, name, np.int16)
+                self.categories[name] = {}
+                column = {'name': name, 'kind': 'category'}
+            else:
+                self.writers[name] = ArrayWriter(
+                    self.tmp_path, name, df[name].dtype, widen=True
+                )
+                column = {'name': name, 'kind': 'numeric'}
+            self.schema['columns'].append(column)
+
+    def append(self, df):
+        if self.schema is None:
+            self.open_columns(df)
+
+        self.writers['_index'].append(df.index)
+        for column in self.schema['columns']:
+            name = column['name']
+            if column['kind'] == 'category':
+                codes = self.categories[name]
+                values = df[name].astype(str)
+                self.writers[name].append([
+                    codes.setdefault(value, len(codes)) for value in values
+                ])
+            else:
+                self.writers[name].append(df[name])
+
+        self.schema['rows'] += len(df)
+
+    # Finish all column files and swap the new store in place of the old one
+    def close(self):
+        if self.schema is None:
+            self.append(self.empty)
+
+        for writer in self.writers.values():
+            writer.close()
+
+        for column in self.schema['columns']:
+            if column['kind'] == 'category':
+                column['categories'] = list(self.categories[column['name']])
+
+        with open(self.tmp_path.joinpath(schema_name), 'w') as file:
+            json.dump(self.schema, file, indent=1)
+
+        commit_store(self.tmp_path, self.store_path)
+
+# Write a DataFrame as one file per column into the store directory
+def write_store(df, store_path):
+    writer = StoreWriter(store_path)
+    writer.append(df)
+    writer.close()
+
+# Load the store into a DataFrame; the columns in lazy are left out and can be
+# opened with read_text when they are needed
+def read_store(store_path, lazy=('Lyrics',)):
+    store_path = Path(store_path)
+
+    with open(store_path.joinpath(schema_name), 'r') as file:
+        schema = json.load(file)
+
+    index = pd.Index(
+        read_text(store_path, '_index').to_series(), name=schema['index']
+    )
+
+    data = {}
+    for column in schema['columns']:
+        name = column['name']
+        if name in lazy:
+            continue
+
+        if column['kind'] == 'text':
+            data[name] = read_text(store_path, name).to_series(index)
+        elif column['kind'] == 'category':
+            data[name] = pd.Categorical.from_codes(
+                np.load(store_path.joinpath(name + '.npy')),
+                categories=column['categories']
+            )
+        else:
+            data[name] = np.load(
+                store_path.joinpath(name + '.npy'), mmap_mode='r'
+            )
+
+    return pd.DataFrame(data, index=index)
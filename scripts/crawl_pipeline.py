@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import datetime
+import queue
+import threading
+import time
+
+from scripts.collect_lyrics_data import (
+    find_artist_id, find_artist_list, find_song_ids, find_song_meta, iter_pages,
+    log_path, max_pages, num_song_ids, request_rate, resolve_artist,
+    scrape_song_url, start_telemetry, state_path, write_log, write_song
+)
+from scripts import telemetry
+from scripts.crawl_state import CrawlState
+from scripts.rate_limiter import RateLimiter
+
+
+# Define pipeline parameters
+# Number of worker threads per stage
+stage_workers = {
+    'search': 1,
+    'list': 2,
+    'metadata': 4,
+    'scrape': 4,
+    'persist': 1
+}
+# Maximum number of items waiting in front of a stage; a full queue blocks
+# the stage before it
+queue_size = 32
+# Interval between two progress reports in seconds
+report_interval = 10
+
+# Marker telling a worker that no more items will arrive
+done = object()
+
+
+# Stage of the pipeline: worker threads take items from a bounded queue and
+# pass every item produced by func on to the next stage
+class Stage:
+    def __init__(self, name, func, workers, maxsize=queue_size):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = queue.Queue(maxsize)
+        self.next = None
+
+        # Numbers for the progress report
+        self.lock = threading.Lock()
+        self.items = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.error = None
+        self.running = workers
+
+    # Process items until the end marker arrives; the last worker to stop
+    # passes one end marker per worker on to the next stage
+    def work(self):
+        while True:
+            item = self.inbox.get()
+            if item is done:
+                break
+
+            t_start = time.perf_counter()
+            emitted = 0
+            blocked = 0.0
+            try:
+                for result in self.func(item):
+                    if self.next is not None:
+                        # Blocks while the next stage is behind
+                        t_put = time.perf_counter()
+                        self.next.inbox.put(result)
+                        blocked += time.perf_counter() - t_put
+                    emitted += 1
+            except Exception as error:
+                # Keep going so the other items are finished and recorded
+                with self.lock:
+                    self.errors += 1
+                    self.error = self.error or error
+
+            with self.lock:
+                self.items += 1
+                self.emitted += emitted
+                self.busy += time.perf_counter() - t_start - blocked
+                self.blocked += blocked
+
+        with self.lock:
+            self.running -= 1
+            last = self.running == 0
+
+        if last and self.next is not None:
+            for _ in range(self.next.workers):
+                self.next.inbox.put(done)
+
+    # Start the worker threads
+    def start(self):
+        self.threads = [
+            threading.Thread(target=self.work, name='{}-{}'.format(self.name, i), daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    # Progress line with throughput, the share of time the workers were busy
+    # or blocked by the next stage and the number of items waiting in the
+    # queue; the bottleneck is busy while the stages before it are blocked
+    def report(self, t_elapsed):
+        worker_time = max(t_elapsed * self.workers, 1e-9)
+        with self.lock:
+            return '{:<9} {:>2} workers {:>7} items {:>8.2f}/s {:>5.0%} busy {:>5.0%} blocked  queue {:>3}/{} {:>4} errors'.format(
+                self.name, self.workers, self.items, self.items / max(t_elapsed, 1e-9),
+                self.busy / worker_time, self.blocked / worker_time,
+                self.inbox.qsize(), self.inbox.maxsize, self.errors
+            )
+
+
+# Crawl in the stages search, list, metadata, scrape and persist, each with
+# its own workers; bounded queues between the stages make a slow stage hold
+# back the ones before it. Work recorded in the crawl state is skipped
+class CrawlPipeline:
+    def __init__(self, state, workers=stage_workers, rate=request_rate,
+                 maxsize=queue_size):
+        self.state = state
+        self.limiter = RateLimiter(rate)
+
+        # Songs not persisted yet per artist; an artist is done when all of
+        # its songs are persisted
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+        self.stages = [
+            Stage('search', self.search_artist, workers['search'], maxsize),
+            Stage('list', self.list_songs, workers['list'], maxsize),
+            Stage('metadata', self.fetch_meta, workers['metadata'], maxsize),
+            Stage('scrape', self.scrape_lyrics, workers['scrape'], maxsize),
+            Stage('persist', self.persist_song, workers['persist'], maxsize)
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next = next_stage
+
+    # Resolve an artist name to its ID, skipping artists that are done
+    def search_artist(self, artist):
+        artist_id = resolve_artist(self.state, artist, self.find_artist_id)
+        if artist_id:
+            yield artist, artist_id
+
+    # Search an artist ID once the limiter allows the request
+    def find_artist_id(self, artist):
+        self.limiter.acquire()
+
+        return find_artist_id(artist)
+
+    # Song IDs and next page of a page of an artist, listed only once
+    def list_page(self, artist_id, page):
+        listed = self.state.page(artist_id, page)
+        if listed is None:
+            self.limiter.acquire()
+            listed = find_song_ids(artist_id, num_song_ids, page)
+            self.state.add_page(artist_id, page, *listed)
+
+        return listed
+
+    # List the songs of an artist, a few pages at the same time
+    def list_songs(self, item):
+        artist, artist_id = item
+
+        # Hold the artist open until listing is complete
+        self.add_pending(artist, 1)
+
+        pages = iter_pages(lambda page: self.list_page(artist_id, page), max_pages)
+        for page, song_id_list in pages:
+            for song_id in song_id_list:
+                if not self.state.song_done(song_id):
+                    self.add_pending(artist, 1)
+                    yield artist, song_id
+
+        self.add_pending(artist, -1)
+
+    # Fetch the song data and the url of the lyrics page
+    def fetch_meta(self, item):
+        artist, song_id = item
+        self.limiter.acquire()
+        song_meta, url = find_song_meta(song_id)
+
+        yield artist, song_id, song_meta, url
+
+    # Fetch the lyrics page
+    def scrape_lyrics(self, item):
+        artist, song_id, song_meta, url = item
+        self.limiter.acquire()
+
+        yield artist, song_id, song_meta + (scrape_song_url(url),)
+
+    # Write the song and record it in the crawl state
+    def persist_song(self, item):
+        artist, song_id, song_data = item
+        self.state.set_song(song_id, write_song(song_data, song_id))
+        self.add_pending(artist, -1)
+
+        return ()
+
+    # Change the number of pending songs of an artist and mark the artist as
+    # done when none are left; failed songs keep their artist open
+    def add_pending(self, artist, change):
+        with self.pending_lock:
+            self.pending[artist] = self.pending.get(artist, 0) + change
+            finished = self.pending[artist] == 0
+            if finished:
+                del self.pending[artist]
+
+        if finished:
+            self.state.finish_artist(artist)
+
+    # Print a progress report for every stage
+    def report(self, t_start):
+        t_elapsed = time.monotonic() - t_start
+        for stage in self.stages:
+            print(stage.report(t_elapsed))
+        print()
+
+    # Crawl all artists and return the numbers for the log file; the first
+    # error is raised after all other items went through the pipeline
+    def crawl(self, artist_list):
+        t_start = time.monotonic()
+        for stage in self.stages:
+            stage.start()
+
+        # Feed the artists from a thread, as the first queue may fill up
+        def feed():
+            for artist in artist_list:
+                self.stages[0].inbox.put(artist)
+            for _ in range(self.stages[0].workers):
+                self.stages[0].inbox.put(done)
+
+        threading.Thread(target=feed, daemon=True).start()
+
+        # Report while waiting for the last stage to finish
+        for thread in self.stages[-1].threads:
+            while thread.is_alive():
+                thread.join(report_interval)
+                if thread.is_alive():
+                    self.report(t_start)
+
+        self.report(t_start)
+
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+
+        return self.state.summary(artist_list)
+
+
+# Main function to scrape and store data in a staged pipeline
+def main():
+    # Log start time
+    t_start = datetime.datetime.now()
+
+    # Print start info to console
+    print('{}: Starting pipeline scraping process ({} requests/s)...'.format(
+        t_start.strftime('%Y-%m-%d %H:%M:%S'), request_rate
+    ))
+
+    # Record all requests and resume from the state of an interrupted crawl
+    start_telemetry(log_path, t_start)
+    state = CrawlState(state_path)
+    num_artists, num_songs, not_found = CrawlPipeline(state).crawl(find_artist_list())
+    state.close()
+
+    # Log end time
+    t_end = datetime.datetime.now()
+
+    # Write log file
+    write_log(log_path, t_start, t_end, num_artists, num_songs, not_found,
+              telemetry.stop())
+
+    # Print end info to console
+    print('{}: Success! Scraping finished.'.format(t_end.strftime('%Y-%m-%d %H:%M:%S')))
+
+
+if __name__ == '__main__':
+    main()
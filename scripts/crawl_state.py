@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import sqlite3
+import threading
+
+
+# Tables of the crawl state: resolved artists (artist_id is NULL for artists
+# that were not found), listed pages and the songs found on them (file is
+# NULL until the song was written)
+schema = '''
+CREATE TABLE IF NOT EXISTS artists (
+    name TEXT PRIMARY KEY,
+    artist_id INTEGER,
+    done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS pages (
+    artist_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    next_page INTEGER,
+    PRIMARY KEY (artist_id, page)
+);
+CREATE TABLE IF NOT EXISTS songs (
+    song_id INTEGER PRIMARY KEY,
+    artist_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    file TEXT
+);
+'''
+
+
+# Progress of a crawl kept in SQLite; every step is committed as soon as it
+# is done, so a restarted crawl skips all completed work. The connection is
+# shared by all threads of a crawl and guarded by a lock
+class CrawlState:
+    def __init__(self, state_path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(state_path), check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self.connection.executescript(schema)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    # Artist ID and done flag of a resolved artist, None if not resolved yet
+    def artist(self, name):
+        with self.lock:
+            return self.connection.execute(
+                'SELECT artist_id, done FROM artists WHERE name = ?', (name,)
+            ).fetchone()
+
+    # Record the artist ID found for a name; artists without an ID are done
+    def set_artist(self, name, artist_id):
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO artists VALUES (?, ?, ?)',
+                    (name, artist_id, int(not artist_id))
+                )
+
+    # Mark an artist as done after all pages were crawled
+    def finish_artist(self, name):
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    'UPDATE artists SET done = 1 WHERE name = ?', (name,)
+                )
+
+    # Song IDs and next page of a listed page, None if not listed yet
+    def page(self, artist_id, page):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT next_page FROM pages WHERE artist_id = ? AND page = ?',
+                (artist_id, page)
+            ).fetchone()
+            if row is None:
+                return None
+
+            song_id_list = [song_id for song_id, in self.connection.execute(
+                'SELECT song_id FROM songs WHERE artist_id = ? AND page = ? '
+                'ORDER BY position', (artist_id, page)
+            )]
+
+            return song_id_list, row[0]
+
+    # Record the song IDs and next page of a listed page
+    def add_page(self, artist_id, page, song_id_list, next_page):
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    'INSERT OR IGNORE INTO songs (song_id, artist_id, page, position) '
+                    'VALUES (?, ?, ?, ?)',
+                    [(song_id, artist_id, page, position)
+                     for position, song_id in enumerate(song_id_list)]
+                )
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO pages VALUES (?, ?, ?)',
+                    (artist_id, page, next_page)
+                )
+
+    # Check whether a song was written already
+    def song_done(self, song_id):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT file FROM songs WHERE song_id = ?', (song_id,)
+            ).fetchone()
+
+            return row is not None and row[0] is not None
+
+    # Record the file a song was written to
+    def set_song(self, song_id, file):
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    'UPDATE songs SET file = ? WHERE song_id = ?',
+                    (str(file), song_id)
+                )
+
+    # Number of artists found, number of songs written and the artists not
+    # found over the whole crawl of the given artist list
+    def summary(self, artist_list):
+        with self.lock:
+            artist_ids = dict(self.connection.execute(
+                'SELECT name, artist_id FROM artists WHERE done = 1'
+            ))
+            song_counts = dict(self.connection.execute(
+                'SELECT artist_id, COUNT(*) FROM songs WHERE file IS NOT NULL '
+                'GROUP BY artist_id'
+            ))
+
+            found = [name for name in artist_list if artist_ids.get(name)]
+            not_found = [
+                name for name in artist_list
+                if name in artist_ids and not artist_ids[name]
+            ]
+            num_songs = sum(
+                song_counts.get(artist_id, 0)
+                for artist_id in {artist_ids[name] for name in found}
+            )
+
+            return len(found), num_songs, not_found
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from collections import Counter
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import requests
+import time
+
+from scripts import http_session, telemetry
+
+
+# Define cache parameters
+# Time to live of cached responses in seconds for URLs not matching any of
+# the endpoint patterns
+default_ttl = 24 * 60 * 60
+
+
+# Raised in cache-only mode for requests that are not cached yet
+class CacheMiss(requests.RequestException):
+    pass
+
+
+# Persistent cache of GET responses with one metadata and one body file per
+# request; stale responses are revalidated with ETag and Last-Modified, and
+# in cache-only mode no requests are sent at all
+class ResponseCache:
+    def __init__(self, cache_path, ttls=(), cache_only=False):
+        self.cache_path = Path(cache_path)
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self.cache_only = cache_only
+        self.stats = Counter()
+
+    # Time to live for a URL from the first matching endpoint pattern
+    def ttl(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+
+        return default_ttl
+
+    # Paths of the metadata and body files of a request; headers are not
+    # part of the key, so the access token is never written to disk
+    def paths(self, url, params=None, data=None):
+        key = json.dumps(
+            [url, sorted((params or {}).items()), sorted((data or {}).items())],
+            default=str
+        )
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        path = self.cache_path.joinpath(digest[:2], digest)
+
+        return path.with_suffix('.json'), path.with_suffix('.body')
+
+    # Load a cached entry, None if the request is not cached
+    def load(self, meta_path, body_path):
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+
+        return meta, body
+
+    # Store a response, replacing the files atomically so that concurrent
+    # readers never see a partial entry
+    def store(self, meta_path, body_path, meta, body):
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        suffix = '.{}.tmp'.format(os.getpid())
+
+        if body is not None:
+            tmp_path = body_path.with_name(body_path.name + suffix)
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, body_path)
+
+        tmp_path = meta_path.with_name(meta_path.name + suffix)
+        with open(tmp_path, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, meta_path)
+
+    # Send a GET request unless a fresh response is cached
+    def get(self, url, params=None, data=None, headers=None, **kwargs):
+        t_start = time.perf_counter()
+        meta_path, body_path = self.paths(url, params, data)
+        entry = self.load(meta_path, body_path)
+
+        if entry is not None:
+            meta, body = entry
+            if self.cache_only or time.time() - meta['stored'] < self.ttl(url):
+                self.stats['hit'] += 1
+                telemetry.record(
+                    url, status=meta['status'], size=len(body), source='cache',
+                    latency=time.perf_counter() - t_start
+                )
+                return to_response(meta, body)
+        elif self.cache_only:
+            self.stats['miss'] += 1
+            telemetry.record(url, source='cache', error='CacheMiss')
+            raise CacheMiss('Not in cache: {}'.format(url))
+
+        # Ask the server to confirm a stale response instead of resending it
+        headers = dict(headers or {})
+        if entry is not None:
+            if meta['headers'].get('ETag'):
+                headers['If-None-Match'] = meta['headers']['ETag']
+            if meta['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+
+        response = http_session.get(
+            url, params=params, data=data, headers=headers, **kwargs
+        )
+
+        if entry is not None and response.status_code == 304:
+            self.stats['revalidated'] += 1
+            meta['stored'] = time.time()
+            self.store(meta_path, body_path, meta, None)
+            return to_response(meta, body)
+
+        self.stats['miss'] += 1
+        if response.status_code == 200:
+            meta = {
+                'url': response.url,
+                'status': response.status_code,
+                'encoding': response.encoding,
+                'headers': dict(response.headers),
+                'stored': time.time()
+            }
+            self.store(meta_path, body_path, meta, response.content)
+
+        return response
+
+
+# Rebuild a response object from a cache entry
+def to_response(meta, body):
+    response = requests.Response()
+    response.url = meta['url']
+    response.status_code = meta['status']
+    response.encoding = meta['encoding']
+    response.headers.update(meta['headers'])
+    response._content = body
+
+    return response
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from email.utils import parsedate_to_datetime
+import datetime
+import random
+import requests
+from requests.adapters import HTTPAdapter
+import time
+
+from scripts import telemetry
+
+
+# Define request parameters
+# Timeouts for connecting and reading in seconds
+timeout = (5, 30)
+# Number of attempts per request before giving up
+max_attempts = 5
+# Base and maximum delay for the exponential backoff in seconds
+backoff_base = 0.5
+backoff_max = 30
+# Longest Retry-After delay of a rate limited response that is honored in
+# seconds; longer delays fall back to the backoff
+retry_after_max = 60
+# Number of pooled keep-alive connections per host, at least the number of
+# concurrent requests
+pool_size = 16
+# Status codes of responses that are worth retrying
+retry_status = (429, 500, 502, 503, 504)
+
+
+# Create a session that keeps connections alive and reuses them
+def make_session(pool_size=pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+# Delay before the next attempt using exponential backoff with full jitter
+def backoff_delay(attempt):
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+# Delay requested by a Retry-After header in seconds, None if not given
+def retry_after(response):
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+
+    # The header holds either a number of seconds or an HTTP date
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, (date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+# Delay before retrying a rate limited response: the Retry-After delay up to
+# retry_after_max, the backoff if it is missing or longer
+def rate_limit_delay(response, attempt):
+    delay = retry_after(response)
+    if delay is None or delay > retry_after_max:
+        return backoff_delay(attempt)
+
+    return delay
+
+# Send a GET request over the shared session; connection errors, timeouts,
+# rate limiting and server errors are retried with backoff. Every request is
+# recorded with its retries and waits if telemetry is on
+def get(url, **kwargs):
+    kwargs.setdefault('timeout', timeout)
+    t_start = time.perf_counter()
+    waits = {'backoff': 0.0, 'rate_limit_wait': 0.0}
+
+    for attempt in range(max_attempts):
+        last_attempt = attempt == max_attempts - 1
+
+        try:
+            response = session.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if last_attempt:
+                record(url, t_start, attempt, waits, error=error)
+                raise
+            delay = backoff_delay(attempt)
+            waits['backoff'] += delay
+            time.sleep(delay)
+            continue
+
+        if response.status_code in retry_status and not last_attempt:
+            # Honor the delay requested by the server when rate limited
+            if response.status_code == 429:
+                delay = rate_limit_delay(response, attempt)
+                waits['rate_limit_wait'] += delay
+            else:
+                delay = backoff_delay(attempt)
+                waits['backoff'] += delay
+            time.sleep(delay)
+            continue
+
+        record(url, t_start, attempt, waits, response)
+        response.raise_for_status()
+
+        return response
+
+# Record a finished request with the response or the error it failed with
+def record(url, t_start, retries, waits, response=None, error=None):
+    telemetry.record(
+        response.url if response is not None else url,
+        status=response.status_code if response is not None else None,
+        latency=time.perf_counter() - t_start,
+        size=len(response.content) if response is not None else 0,
+        retries=retries,
+        error=type(error).__name__ if error is not None else None,
+        **waits
+    )
+
+
+# Session shared by all requests
+session = make_session()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from bs4 import BeautifulSoup
+import re
+
+
+# Pattern matching div tags while skipping over comments, scripts and styles,
+# which may contain markup that is not part of the page
+tag_pattern = re.compile(
+    r'<!--.*?-->|<(script|style)\b.*?</\1\s*>|<(/?)div\b([^>]*)>',
+    re.S | re.I
+)
+# Pattern matching the value of a class attribute
+class_pattern = re.compile(
+    r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))', re.I
+)
+
+
+# Check whether the attributes of a tag include the given class
+def has_class(attrs, name):
+    match = class_pattern.search(attrs)
+    if not match:
+        return False
+
+    value = next(group for group in match.groups() if group is not None)
+
+    return name in value.split()
+
+# Cut the lyrics container out of a page by counting nested div tags, so
+# that only the container has to be parsed; None if no container was found
+def lyrics_fragment(html):
+    start = None
+    depth = 0
+
+    for match in tag_pattern.finditer(html):
+        if match.group(3) is None:
+            continue
+
+        closing = match.group(2) == '/'
+        # Self-closing div tags are closed right away
+        if not closing and match.group(3).rstrip().endswith('/'):
+            continue
+
+        if start is None:
+            if not closing and has_class(match.group(3), 'lyrics'):
+                start = match.start()
+                depth = 1
+        else:
+            depth += -1 if closing else 1
+            if depth == 0:
+                return html[start:match.end()]
+
+    # Unclosed container running to the end of the page
+    if start is not None:
+        return html[start:]
+
+    return None
+
+# Extract the lyrics from a Genius song page by parsing the full page
+def extract_lyrics_full(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    return soup.find('div', class_='lyrics').get_text()
+
+# Extract the lyrics from a Genius song page by parsing only the lyrics
+# container; gives the same text as extract_lyrics_full
+def extract_lyrics(html):
+    fragment = lyrics_fragment(html)
+    if fragment is None:
+        return extract_lyrics_full(html)
+
+    return extract_lyrics_full(fragment)
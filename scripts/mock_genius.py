@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+
+# Define mock catalog parameters
+# Number of artists and songs per artist
+num_artists = 20
+songs_per_artist = 30
+# Every n-th song of an artist lists a different primary artist
+featured_every = 5
+# Every n-th song has no release date and no pageviews
+missing_every = 7
+# Number of verses and lines per verse of the lyrics
+num_verses = 4
+num_lines = 6
+
+# Words used for song titles and lyrics
+words = [
+    'love', 'heart', 'night', 'rain', 'road', 'fire', 'dream', 'time',
+    'home', 'light', 'river', 'wind', 'gold', 'blue', 'summer', 'stone'
+]
+
+
+# Stand-in for the Genius API and lyrics pages with a synthetic catalog;
+# latency, server errors and rate limiting can be injected to measure and
+# test the crawl code without network access
+class MockGenius:
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=0, artists=num_artists, songs=songs_per_artist,
+                 seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.artists = artists
+        self.songs = songs
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.server = None
+
+    # Names of all artists in the catalog
+    def artist_names(self):
+        return [artist_name(i) for i in range(self.artists)]
+
+    # Check whether an ID belongs to an artist of the catalog
+    def is_artist(self, artist_id):
+        return 0 <= artist_id - 1000 < self.artists
+
+    # Search hits for all artists whose name contains the query
+    def search(self, query):
+        hits = [
+            {'result': {'primary_artist': {'name': name, 'id': 1000 + i}}}
+            for i, name in enumerate(self.artist_names())
+            if query.lower() in name.lower()
+        ]
+
+        return {'hits': hits[:10]}
+
+    # One page of the songs of an artist
+    def artist_songs(self, artist_id, per_page, page):
+        song_ids = [artist_id * 1000 + k for k in range(self.songs)]
+        start = (page - 1) * per_page
+        songs = [
+            {'id': song_id, 'primary_artist': {'id': song_primary(song_id)}}
+            for song_id in song_ids[start:start + per_page]
+        ]
+        next_page = page + 1 if start + per_page < len(song_ids) else None
+
+        return {'songs': songs, 'next_page': next_page}
+
+    # Data of a single song with the url of its lyrics page
+    def song(self, song_id, base_url):
+        artist_id = song_primary(song_id)
+        title = song_title(song_id)
+        song = {
+            'id': song_id,
+            'title': title,
+            'full_title': '{} by {}'.format(title, artist_name(artist_id - 1000)),
+            'primary_artist': {'id': artist_id, 'name': artist_name(artist_id - 1000)},
+            'lyrics_state': 'complete',
+            'url': '{}/lyrics/{}'.format(base_url, song_id)
+        }
+
+        if song_id % missing_every:
+            song['release_date'] = '{}-{:02d}-{:02d}'.format(
+                1960 + song_id % 60, 1 + song_id % 12, 1 + song_id % 28
+            )
+            song['stats'] = {'pageviews': song_id % 100000}
+        else:
+            song['release_date'] = None
+            song['stats'] = {}
+
+        return {'song': song}
+
+    # Draw the status of the next response: 429, 503 or 200
+    def draw_status(self):
+        with self.lock:
+            draw = self.rng.random()
+            delay = self.latency * self.rng.uniform(0.5, 1.5)
+
+        if draw < self.rate_limit_rate:
+            return 429, delay
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 503, delay
+
+        return 200, delay
+
+    # Start serving on a free port in a background thread; returns the base url
+    def start(self, port=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), MockHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        return self.url()
+
+    # Base url of the running server
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Request handler of the mock server
+class MockHandler(BaseHTTPRequestHandler):
+    # Keep connections alive and send small responses right away
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        mock = self.server.mock
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        # The search query is sent as form data in the body of the request
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode()
+            query.update({key: values[0] for key, values in parse_qs(body).items()})
+
+        status, delay = mock.draw_status()
+        time.sleep(delay)
+
+        endpoint, payload = self.route(mock, parts.path, query)
+        with mock.lock:
+            mock.requests[endpoint] += 1
+
+        if status == 429:
+            self.send_body(429, b'', extra={'Retry-After': str(mock.retry_after)})
+        elif status == 503:
+            self.send_body(503, b'')
+        elif payload is None:
+            self.send_body(404, b'')
+        elif endpoint == 'lyrics':
+            self.send_body(200, payload.encode(), 'text/html; charset=utf-8')
+        else:
+            body = {'meta': {'status': 200}, 'response': payload}
+            self.send_body(200, json.dumps(body).encode(), 'application/json')
+
+    # Endpoint name and response payload for a path, None if not found
+    def route(self, mock, path, query):
+        if path == '/search':
+            return 'search', mock.search(query.get('q', ''))
+
+        match = re.fullmatch(r'/artists/(\d+)/songs', path)
+        if match and mock.is_artist(int(match.group(1))):
+            return 'artist_songs', mock.artist_songs(
+                int(match.group(1)), int(query.get('per_page', 20)),
+                int(query.get('page', 1))
+            )
+
+        match = re.fullmatch(r'/(songs|lyrics)/(\d+)', path)
+        if match and mock.is_artist(int(match.group(2)) // 1000):
+            song_id = int(match.group(2))
+            if match.group(1) == 'songs':
+                return 'songs', mock.song(song_id, mock.url())
+            return 'lyrics', lyrics_page(song_id)
+
+        return 'unknown', None
+
+    def send_body(self, status, body, content_type='text/plain', extra=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Name of the artist with the given number
+def artist_name(i):
+    return 'Mock Artist {}'.format(i)
+
+# Primary artist ID of a song; every few songs feature another artist
+def song_primary(song_id):
+    artist_id, k = divmod(song_id, 1000)
+    if k % featured_every == featured_every - 1:
+        return artist_id + 1
+
+    return artist_id
+
+# Title of a song
+def song_title(song_id):
+    return '{} {} {}'.format(
+        words[song_id % len(words)].title(), words[song_id // 7 % len(words)],
+        song_id % 1000
+    )
+
+# Lyrics page of a song shaped like a Genius song page
+def lyrics_page(song_id):
+    verses = ''.join(
+        '<p>[Verse {}]<br/>\n{}</p>'.format(v + 1, '<br/>\n'.join(
+            '<a href="/annotation/{0}">{1} &amp; {2}</a>'.format(
+                song_id + line, words[(song_id + v + line) % len(words)],
+                words[(song_id * 3 + line) % len(words)]
+            ) for line in range(num_lines)
+        )) for v in range(num_verses)
+    )
+
+    return (
+        '<!DOCTYPE html><html><head><title>{0}</title>'
+        '<script>var song = {{"id": {1}}};</script></head><body>'
+        '<div class="header"><div class="nav">Home</div></div>'
+        '<div class="song_body"><div class="lyrics">\n<!--sse-->{2}<!--/sse-->\n</div></div>'
+        '<div class="footer">Footer</div></body></html>'
+    ).format(song_title(song_id), song_id, verses)
+
+
+# Serve the mock API until interrupted
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    mock = MockGenius()
+    print('Mock Genius API at {}'.format(mock.start(port)))
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == '__main__':
+    main()
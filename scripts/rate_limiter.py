@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import asyncio
+import threading
+import time
+
+from scripts import telemetry
+
+
+# Limiter of the requests of a crawl to rate per second, shared by threads
+# and coroutines: every request reserves the next free slot, so waiting
+# requests are served in order of arrival. After an idle period up to
+# capacity requests can be sent at once; with capacity 1 the requests are
+# spaced evenly
+class RateLimiter:
+    def __init__(self, rate, capacity=1):
+        self.interval = 1 / rate
+        self.tolerance = (capacity - 1) * self.interval
+        self.t_next = time.monotonic()
+        self.lock = threading.Lock()
+
+    # Reserve the slots of the given number of requests and return the time
+    # in seconds until the last of them
+    def reserve(self, requests=1):
+        with self.lock:
+            t_now = time.monotonic()
+            t_slot = t_now
+            for _ in range(requests):
+                t_slot = max(t_now, self.t_next - self.tolerance)
+                self.t_next = max(self.t_next, t_slot) + self.interval
+
+        return t_slot - t_now
+
+    # Wait for the slots of the given number of requests in a thread; the
+    # wait is recorded with the request it delays
+    def acquire(self, requests=1):
+        delay = self.reserve(requests)
+        telemetry.wait(delay)
+        time.sleep(delay)
+
+        return delay
+
+    # Wait for the slots of the given number of requests in a coroutine and
+    # return the wait, to be recorded in the thread sending the requests
+    async def acquire_async(self, requests=1):
+        delay = self.reserve(requests)
+        await asyncio.sleep(delay)
+
+        return delay
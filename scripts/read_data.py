@@ -2,86 +2,487 @@
 
 
 # Import statements go here
-from collections import Counter
-from io import StringIO
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+from itertools import chain
+import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import re
+import time
 
+from scripts.corpus_store import StoreWriter, read_store, read_text
+from scripts.sketches import YearSketches, read_year_sketches, write_year_sketches
+from scripts.song_archive import archive_dir, archive_entries, read_records
+from scripts.token_store import TokenWriter, read_tokens
+from scripts.year_counts import YearCountsBuilder, read_year_counts, write_year_counts
 
-def read_data(lyr_path, save_path):
-    # Define column names
-    columns = [
-        'FullTitle',
-        'SongTitle',
-        'Artist',
-        'ReleaseDate',
-        'Pageviews',
-        'LyricsState',
-        'Lyrics'
+
+# Define column names
+columns = [
+    'FullTitle',
+    'SongTitle',
+    'Artist',
+    'ReleaseDate',
+    'Pageviews',
+    'LyricsState',
+    'Lyrics'
+]
+
+# Number of files handed to a worker process at once
+chunk_size = 64
+# Maximum number of batches of files parsed ahead of the consumer
+max_pending = 16
+# Number of songs cleaned and written at once by the chunked consumers
+chunk_rows = 5000
+# Pattern of recording dates given as M/D/YY in song titles
+date_pattern = r'(?P<month>\d+)/(?P<day>\d+)/(?P<year>\d+)'
+# Suffix of song files holding one JSON record per line
+record_suffix = '.jsonl'
+# Suffix of song files in the legacy format with fields joined by ';##'
+legacy_suffix = '.txt'
+# Number of archived songs handed to a worker process at once
+archive_chunk = 2000
+
+
+# Find all song files; legacy files are skipped if the same song was also
+# stored as a JSON record
+def find_songs(lyr_path):
+    records = {song.stem: song for song in lyr_path.glob('*' + record_suffix)}
+    legacy = [
+        song for song in lyr_path.glob('*' + legacy_suffix)
+        if song.stem not in records
     ]
 
-    # Initialize empty DataFrame
-    df = pd.DataFrame(columns=columns)
-
-    # Load lyrics data into DataFrame row by row
-    for song in lyr_path.glob('*.txt'):
-        with open(song, 'r') as file:
-            # Delete all markers for Verse or Chorus
-            input = re.sub(r'\[\w+\s*\w*\]', '', file.read())
-            # Replace all newline characters with a single whitespace
-            input = re.sub(r'\n+', ' ', input)
-            # Replace all semicolons that are not in the head of the file with colons
-            input = re.sub(r';(?! ##)', ',', input)
-            # Delete all double pound signs that were used as special markers
-            input = StringIO(re.sub('(?<=;) ## ', '', input))
-
-            # Effective with new changes in collect lyrics
-            # # Delete all markers for Verse or Chorus
-            # input = re.sub(r'\[\w+\s*\w*\] *', '', file.read())
-            # # Replace all newline characters with a single whitespace
-            # input = re.sub(r'\n+', ' ', input)
-            # # Replace all semicolons not followed by double pound signs with colons
-            # input = re.sub(r';(?!##)', ',', input)
-            # # Delete all double pound signs that were used as special markers
-            # input = StringIO(re.sub('(?<=;)## ', '', input))
-
-        df = df.append(pd.read_csv(input, sep=';', header=None, names=columns))
-
-    # Find recording dates in titles and replace ReleaseDate
-    for i in range(len(df)):
-        m = re.search(
-            r'(?P<month>\d+)/(?P<day>\d+)/(?P<year>\d+)', df.iloc[i, 1]
-        )
-        if m:
-            new_date = '/'.join(
-                ['19' + m.group('year'),
-                m.group('month').zfill(2),
-                m.group('day').zfill(2)]
-            )
-            df.iloc[i, 3] = new_date
+    return sorted(list(records.values()) + legacy)
+
+# Parse a single song file into a plain record with the fields in columns,
+# falling back to the legacy parser for .txt files
+def parse_song(song):
+    if song.suffix == record_suffix:
+        return parse_record(song)
+
+    return parse_legacy(song)
+
+# Parse a song file holding a JSON record with one key per column, which
+# needs a single decode and leaves semicolons in the lyrics untouched
+def parse_record(song):
+    with open(song, 'r') as file:
+        return record_values(json.loads(file.readline()))
+
+# Turn a decoded JSON record into a plain record with the fields in columns
+def record_values(data):
+    # Delete all markers for Verse or Chorus and replace all newline
+    # characters with a single whitespace
+    lyrics = re.sub(r'\n+', ' ', re.sub(r'\[\w+\s*\w*\]', '', data['Lyrics']))
+
+    # Use the same string values as in the legacy files, e.g. 'None'
+    return [str(data[name]) for name in columns[:-1]] + [lyrics]
+
+# Parse a single lyrics file in the legacy format
+def parse_legacy(song):
+    with open(song, 'r') as file:
+        # Delete all markers for Verse or Chorus
+        input = re.sub(r'\[\w+\s*\w*\]', '', file.read())
+        # Replace all newline characters with a single whitespace
+        input = re.sub(r'\n+', ' ', input)
+        # Replace all semicolons that are not in the head of the file with colons
+        input = re.sub(r';(?! ##)', ',', input)
+        # Delete all double pound signs that were used as special markers
+        input = re.sub('(?<=;) ## ', '', input)
+
+        # Effective with new changes in collect lyrics
+        # # Delete all markers for Verse or Chorus
+        # input = re.sub(r'\[\w+\s*\w*\] *', '', file.read())
+        # # Replace all newline characters with a single whitespace
+        # input = re.sub(r'\n+', ' ', input)
+        # # Replace all semicolons not followed by double pound signs with colons
+        # input = re.sub(r';(?!##)', ',', input)
+        # # Delete all double pound signs that were used as special markers
+        # input = re.sub('(?<=;)## ', '', input)
+
+    # Only the head of the file still contains semicolons
+    record = input.split(';', len(columns) - 1)
+
+    return record
+
+# Parse a batch of lyrics files into pairs of file name and record
+def parse_batch(songs):
+    return [(song.name, parse_song(song)) for song in songs]
+
+# Parse a batch of archived songs of one shard into pairs of key and record
+def parse_archive_batch(shard_path, entries):
+    return [
+        (key, record_values(data))
+        for key, data in read_records(shard_path, entries)
+    ]
+
+# Yield the results of func for all batches one at a time; the batches are
+# processed in a pool of worker processes, but only a bounded number of
+# batches ahead of the consumer
+def iter_parallel(func, batches, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(func, *batch))
+            if len(pending) > max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+# Yield the parsed records of the given lyrics files one at a time as pairs
+# of file name and record
+def iter_songs(lyr_path, workers=None, songs=None):
+    if songs is None:
+        songs = find_songs(lyr_path)
+
+    t_start = time.perf_counter()
+    yield from iter_parallel(parse_batch, (
+        (songs[i:i + chunk_size],) for i in range(0, len(songs), chunk_size)
+    ), workers)
+    t_parse = time.perf_counter() - t_start
+
+    # Print throughput info to console
+    print('Parsed {} files in {:.2f} s ({:.0f} files/s)'.format(
+        len(songs), t_parse, len(songs) / t_parse if t_parse else 0
+    ))
+
+# Yield the parsed records of the songs in the archive one at a time as
+# pairs of key and record; every shard is read in a few large sequential
+# reads instead of opening one file per song. Takes the entries returned
+# by archive_entries, all latest entries by default
+def iter_archive(archive_path, workers=None, entries=None):
+    if entries is None:
+        entries = archive_entries(archive_path)[0]
+
+    shards = defaultdict(list)
+    for shard_path, entry in entries.values():
+        shards[shard_path].append(entry)
+
+    t_start = time.perf_counter()
+    yield from iter_parallel(parse_archive_batch, (
+        (shard_path, shard[i:i + archive_chunk])
+        for shard_path, shard in sorted(shards.items())
+        for i in range(0, len(shard), archive_chunk)
+    ), workers)
+    t_parse = time.perf_counter() - t_start
+
+    # Print throughput info to console
+    print('Parsed {} archived songs from {} shards in {:.2f} s ({:.0f} songs/s)'.format(
+        len(entries), len(shards), t_parse, len(entries) / t_parse if t_parse else 0
+    ))
+
+# Build a DataFrame indexed by file name from a list of parsed records
+def songs_frame(records):
+    return pd.DataFrame.from_records(
+        [[name] + list(record) for name, record in records],
+        columns=['File'] + columns
+    ).set_index('File')
+
+# Group a stream of parsed records into cleaned DataFrames of at most rows
+# songs; an empty stream still gives one empty chunk
+def iter_chunks(records, rows=chunk_rows):
+    chunk = []
+    empty = True
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == rows:
+            yield clean_data(songs_frame(chunk))
+            chunk = []
+            empty = False
+
+    if chunk or empty:
+        yield clean_data(songs_frame(chunk))
+
+# Parse the given lyrics files and build the DataFrame in one step
+def load_songs(lyr_path, workers=None, songs=None):
+    return songs_frame(list(iter_songs(lyr_path, workers, songs)))
+
+# Fix recording dates, drop songs without dates and convert column types in
+# one vectorized pass
+def clean_data(df):
+    # Find recording dates in titles, which replace ReleaseDate
+    rec = df['SongTitle'].str.extract(date_pattern)
+    rec_date = (
+        '19' + rec['year'] + '-' + rec['month'].str.zfill(2) + '-' +
+        rec['day'].str.zfill(2)
+    )
+    release = df['ReleaseDate'].mask(rec['year'].notna(), rec_date)
 
     # Drop all rows without a value for ReleaseDate
-    df = df[df['ReleaseDate'] != 'None']
+    keep = (release != 'None').to_numpy()
+    df = df[keep]
+
+    # Change all missing values to 0 to only have numerical data and convert
+    # the types of the metadata columns
+    df = df.assign(
+        ReleaseDate=pd.to_datetime(release[keep].replace('missing', 0)),
+        Pageviews=pd.to_numeric(df['Pageviews'].replace('missing', 0)),
+        LyricsState=df['LyricsState'].replace('missing', 0).astype('category')
+    )
+
+    return df
+
+# Compute the content hash of a lyrics file
+def file_hash(song):
+    with open(song, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+# Create the manifest entry with modification time, size and content hash
+def manifest_entry(song, stat=None, sha1=None):
+    stat = stat or song.stat()
+
+    return {
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'sha1': sha1 or file_hash(song)
+    }
+
+# Load the manifest of already parsed lyrics files
+def read_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+# Store the manifest of already parsed lyrics files
+def write_manifest(manifest, manifest_path):
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+
+# Chunked writer collecting all chunks of songs for a pickled DataFrame; if
+# no chunk arrives, the empty DataFrame is stored
+class PickleWriter:
+    def __init__(self, save_path, empty=None):
+        self.save_path = save_path
+        self.empty = empty if empty is not None else pd.DataFrame()
+        self.chunks = []
+
+    def append(self, df):
+        self.chunks.append(df)
+
+    def close(self):
+        df = pd.concat(self.chunks) if self.chunks else self.empty.copy()
+        if 'LyricsState' in df:
+            df['LyricsState'] = df['LyricsState'].astype('category')
+        df.to_pickle(self.save_path)
+
+
+# Open a chunked writer for a pickled object or, for all other paths, the
+# columnar corpus store; empty is written if no songs are appended
+def open_writer(save_path, empty=None):
+    if Path(save_path).suffix == '.pkl':
+        return PickleWriter(save_path, empty)
+
+    return StoreWriter(save_path, empty)
+
+# Empty DataFrame with all columns of the stored data
+def empty_corpus():
+    return clean_data(songs_frame([])).assign(WordsUsed=np.zeros(0, dtype=np.int64))
+
+# Store data as a pickled object or in the columnar corpus store
+def save_data(df, save_path):
+    writer = open_writer(save_path)
+    writer.append(df)
+    writer.close()
+
+# Load data stored by save_data; the Lyrics column of the corpus store is
+# only read when requested
+def load_data(save_path, lyrics=True):
+    if Path(save_path).suffix == '.pkl':
+        return pd.read_pickle(save_path)
+
+    df = read_store(save_path)
+    if lyrics:
+        df['Lyrics'] = read_text(save_path, 'Lyrics').to_series(df.index)
+
+    return df
+
+# Path of the token store kept next to the stored data
+def token_path(save_path):
+    save_path = Path(save_path)
+
+    return save_path.with_name(save_path.stem + '_tokens')
+
+# Load the token store kept next to the stored data
+def load_tokens(save_path):
+    return read_tokens(token_path(save_path))
+
+# Path of the word counts per year kept next to the stored data
+def year_path(save_path):
+    save_path = Path(save_path)
+
+    return save_path.with_name(save_path.stem + '_years.npz')
+
+# Load the word counts per year over the vocabulary of the token store
+def load_year_counts(save_path, tokens):
+    return read_year_counts(year_path(save_path), tokens.vocab)
+
+# Path of the word count sketches per year kept next to the stored data
+def sketch_path(save_path):
+    save_path = Path(save_path)
+
+    return save_path.with_name(save_path.stem + '_sketch.npz')
+
+# Load the word count sketches per year, which need no token store
+def load_year_sketches(save_path):
+    return read_year_sketches(sketch_path(save_path))
+
+# Kept songs of the stored data with their lyrics in chunks of at most rows
+# songs; the lyrics of the columnar store are only read one chunk at a time
+def iter_stored(save_path, dropped, rows=chunk_rows):
+    df = load_data(save_path, lyrics=False)
+    lyrics = None if 'Lyrics' in df else read_text(save_path, 'Lyrics')
+    keep = np.flatnonzero(~df.index.isin(dropped))
+
+    for start in range(0, len(keep), rows):
+        positions = keep[start:start + rows]
+        chunk = df.iloc[positions]
+        if lyrics is not None:
+            chunk = chunk.assign(Lyrics=[lyrics[row] for row in positions])
+
+        yield chunk[columns + ['WordsUsed']]
+
+# Consume a stream of parsed records chunk by chunk: the stored data, the
+# token store and the word counts per year are written without holding the
+# whole corpus in memory. The word count sketches are only built with
+# sketch, for sketch mode; otherwise sketches of an earlier corpus are
+# removed, as they would be outdated. With dropped given, the songs of the
+# stored corpus that are not dropped are copied first together with their
+# tokens, and records may be None if no songs are added
+def write_corpus(records, save_path, rows=chunk_rows, dropped=None,
+                 sketch=False):
+    stored = load_tokens(save_path) if dropped is not None else None
+    writer = open_writer(save_path, empty_corpus())
+    token_writer = TokenWriter(
+        token_path(save_path), vocab=stored.vocab if stored is not None else ()
+    )
+    year_builder = YearCountsBuilder()
+    sketches = YearSketches() if sketch else None
+
+    if stored is not None:
+        for df in iter_stored(save_path, dropped, rows):
+            token_writer.copy(stored, df.index)
+            year_builder.add(df, stored)
+            if sketches is not None:
+                sketches.add(df, stored)
+            writer.append(df)
+
+    for df in iter_chunks(records, rows) if records is not None else ():
+        # Tokenize the lyrics once and count the individual words per song
+        tokens = token_writer.append(df['Lyrics'])
+        df['WordsUsed'] = tokens.words_used()
+
+        year_builder.add(df, tokens)
+        if sketches is not None:
+            sketches.add(df, tokens)
+        writer.append(df)
+
+    writer.close()
+    token_writer.close()
+    write_year_counts(year_builder.result(token_writer.vocab), year_path(save_path))
+    if sketches is not None:
+        write_year_sketches(sketches, sketch_path(save_path))
+    else:
+        sketch_path(save_path).unlink(missing_ok=True)
+
+def read_data(lyr_path, save_path, workers=None, manifest_path=None,
+              sketch=False):
+    # Stream all lyrics files and archived songs into the stored data
+    songs = find_songs(lyr_path)
+    archive_path = lyr_path.joinpath(archive_dir)
+    entries, counts = archive_entries(archive_path)
+    write_corpus(chain(
+        iter_songs(lyr_path, workers, songs),
+        iter_archive(archive_path, workers, entries)
+    ), save_path, sketch=sketch)
+
+    # Record all parsed files and archive index lines for later incremental
+    # updates
+    if manifest_path is not None:
+        manifest = {song.name: manifest_entry(song) for song in songs}
+        manifest.update(shard_entries(counts))
+        write_manifest(manifest, manifest_path)
+
+# Manifest entries with the number of index lines read from every shard
+def shard_entries(counts):
+    return {
+        '{}/{}'.format(archive_dir, name): {'entries': count}
+        for name, count in counts.items()
+    }
+
+# Reparse only new, changed or deleted lyrics files and newly archived songs
+# and merge the results into the stored data, token store and word counts.
+# Only the parsing is incremental: the store, tokens, word counts and
+# sketches are rewritten by copying the kept songs chunk by chunk, so the
+# I/O of an update still grows with the size of the corpus
+def update_data(lyr_path, save_path, manifest_path, workers=None,
+                sketch=False):
+    manifest = read_manifest(manifest_path)
+
+    # Without a manifest or stored data the corpus has to be built from scratch
+    if (not manifest or not Path(save_path).exists()
+            or not token_path(save_path).exists()
+            or not year_path(save_path).exists()
+            or (sketch and not sketch_path(save_path).exists())):
+        read_data(lyr_path, save_path, workers, manifest_path, sketch)
+        return
+
+    # Songs appended to the archive since the last update; the archive only
+    # grows, so a shard with fewer index lines was replaced
+    read_lines = {
+        name.split('/', 1)[1]: entry['entries'] for name, entry in manifest.items()
+        if name.startswith(archive_dir + '/')
+    }
+    archive_path = lyr_path.joinpath(archive_dir)
+    archived, counts = archive_entries(archive_path, read_lines)
+    if any(counts.get(name, 0) < lines for name, lines in read_lines.items()):
+        read_data(lyr_path, save_path, workers, manifest_path, sketch)
+        return
+    manifest.update(shard_entries(counts))
+
+    current = {song.name: song for song in find_songs(lyr_path)}
+    deleted = [
+        name for name in manifest
+        if name not in current and not name.startswith(archive_dir + '/')
+    ]
+
+    changed = []
+    for name, song in sorted(current.items()):
+        stat = song.stat()
+        entry = manifest.get(name)
 
-    # Change all missing pageviews to 0 to only have numerical data
-    df.replace('missing', 0, inplace=True)
+        # Skip files whose modification time and size are unchanged
+        if (entry and entry['mtime'] == stat.st_mtime
+                and entry['size'] == stat.st_size):
+            continue
 
-    # Initialize empty list for storing the words used in songs
-    words_used = []
+        # Only reparse files whose content really changed
+        sha1 = file_hash(song)
+        if not entry or entry['sha1'] != sha1:
+            changed.append(song)
+        manifest[name] = manifest_entry(song, stat, sha1)
 
-    # Loop through songs in DataFrame and append the words used
-    for song in df['Lyrics']:
-        words_ctn = Counter(re.findall(r'\w+\'*\w*', song.lower()))
-        words_used.append(len(words_ctn))
+    for name in deleted:
+        del manifest[name]
 
-    df['WordsUsed'] = words_used
+    # Print update info to console
+    print('Incremental update: {} new or changed, {} deleted files, {} archived songs'.format(
+        len(changed), len(deleted), len(archived)
+    ))
 
-    # Convert types for the columns Pageviews and LyricsState
-    df['ReleaseDate'] = pd.to_datetime(df['ReleaseDate'])
-    df['Pageviews'] = pd.to_numeric(df['Pageviews'])
-    df['LyricsState'] = df['LyricsState'].astype('category')
-    df['WordsUsed'] = pd.to_numeric(df['WordsUsed'])
+    # Rewrite the data, tokens and word counts per year chunk by chunk with
+    # the dropped songs left out and the reparsed songs appended
+    if changed or deleted or archived:
+        dropped = [song.name for song in changed] + deleted + list(archived)
+        records = chain(
+            iter_songs(lyr_path, workers, changed),
+            iter_archive(archive_path, workers, archived)
+        ) if changed or archived else None
+        write_corpus(records, save_path, dropped=dropped, sketch=sketch)
 
-    # Store data as a pickled object
-    df.to_pickle(save_path)
+    write_manifest(manifest, manifest_path)
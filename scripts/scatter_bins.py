@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import numpy as np
+
+from bokeh.models import ColumnDataSource, Range1d
+
+
+# Define binning parameters
+# Number of songs in view from which on a scatter plot shows binned counts
+# instead of single songs
+bin_songs = 5000
+# Number of bins along the x and y axis
+grid_bins = (60, 40)
+# Share of the data range added on both sides of axes fitted to the data
+range_padding = 0.05
+# Delay in milliseconds after the last range change of a zoom or pan before
+# the data in view is updated
+update_delay = 200
+
+
+# Scatter plot data that is aggregated on the server: while more than
+# threshold songs are in view, only a grid of bins with the number of songs
+# and the mean of a value is sent to the browser; zooming in far enough
+# sends the single songs in view with their metadata columns only. The
+# ranges of the whole view default to the ranges of the data
+class BinnedScatter:
+    def __init__(self, df, x, y, columns, value, threshold=bin_songs,
+                 bins=grid_bins, x_range=None, y_range=None):
+        used = list(dict.fromkeys([x, y, value] + list(columns)))
+        self.df = df[used].dropna(subset=[x, y])
+        self.x = x
+        self.y = y
+        self.value = value
+        self.threshold = threshold
+        self.bins = bins
+        self.x_range = x_range
+        self.y_range = y_range
+
+        self.point_source = ColumnDataSource(data=self.points(self.df.iloc[:0]))
+        self.bin_source = ColumnDataSource(data=bin_points(
+            [], [], [], (0, 1), (0, 1), bins, value
+        ))
+        self.update()
+
+    # Columns of the given songs for the point glyphs
+    def points(self, df):
+        return {name: df[name].to_numpy() for name in df.columns}
+
+    # Show bins or single songs for the songs within the given ranges, the
+    # whole view for None
+    def update(self, x_range=None, y_range=None):
+        xs = self.df[self.x].to_numpy()
+        ys = self.df[self.y].to_numpy()
+        x_range = data_range(xs, x_range or self.x_range)
+        y_range = data_range(ys, y_range or self.y_range)
+
+        visible = ((xs >= x_range[0]) & (xs <= x_range[1]) &
+                   (ys >= y_range[0]) & (ys <= y_range[1]))
+
+        if np.count_nonzero(visible) <= self.threshold:
+            self.point_source.data = self.points(self.df[visible])
+            binned = ([], [], [])
+        else:
+            self.point_source.data = self.points(self.df.iloc[:0])
+            binned = (xs[visible], ys[visible], self.df[self.value].to_numpy()[visible])
+
+        self.bin_source.data = bin_points(*binned, x_range, y_range, self.bins, self.value)
+
+    # Give the plot fixed ranges over all songs, so that Reset returns to the
+    # whole view, and update the data in view after zooming or panning; the
+    # range changes of one zoom or pan arriving within delay milliseconds are
+    # handled by a single update
+    def link(self, plot, delay=update_delay):
+        plot.x_range = fixed_range(self.df[self.x].to_numpy(), self.x_range)
+        plot.y_range = fixed_range(self.df[self.y].to_numpy(), self.y_range)
+        pending = []
+
+        def update_view():
+            pending.clear()
+            self.update(
+                (plot.x_range.start, plot.x_range.end),
+                (plot.y_range.start, plot.y_range.end)
+            )
+
+        def schedule(attr, old, new):
+            if plot.document is None:
+                update_view()
+            elif not pending:
+                pending.append(plot.document.add_timeout_callback(update_view, delay))
+
+        for plot_range in (plot.x_range, plot.y_range):
+            plot_range.on_change('start', schedule)
+            plot_range.on_change('end', schedule)
+
+
+# Range of the values, with the bounds given in view where set
+def data_range(values, view=None):
+    low, high = view or (None, None)
+    if low is None:
+        low = values.min() if len(values) else 0
+    if high is None:
+        high = values.max() if len(values) else 1
+
+    return min(low, high), max(low, high)
+
+# Range of an axis over all values with some padding, or the given bounds;
+# Reset returns to it
+def fixed_range(values, view=None):
+    low, high = data_range(values, view)
+    if view is None:
+        padding = (high - low) * range_padding or 0.5
+        low, high = low - padding, high + padding
+
+    return Range1d(low, high, reset_start=low, reset_end=high)
+
+# Count the points in a grid of bins over the given ranges and take the mean
+# value per bin; returns the columns of the non-empty bins with their
+# centers and sizes
+def bin_points(xs, ys, values, x_range, y_range, bins, value='Value'):
+    # Keep points on the upper edge in the last bin of degenerate ranges
+    x_range = (x_range[0], x_range[1] if x_range[1] > x_range[0] else x_range[0] + 1)
+    y_range = (y_range[0], y_range[1] if y_range[1] > y_range[0] else y_range[0] + 1)
+
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins, range=[x_range, y_range])
+    sums = np.histogram2d(
+        xs, ys, bins=[x_edges, y_edges], weights=np.asarray(values, dtype=float)
+    )[0]
+
+    i, j = np.nonzero(counts)
+    return {
+        'x': (x_edges[i] + x_edges[i + 1]) / 2,
+        'y': (y_edges[j] + y_edges[j + 1]) / 2,
+        'width': np.diff(x_edges)[i],
+        'height': np.diff(y_edges)[j],
+        'count': counts[i, j].astype(np.int64),
+        value: sums[i, j] / counts[i, j]
+    }
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+# Define sketch parameters
+# Error of the word counts relative to the number of words of a year, and
+# the probability that a count stays within it
+count_error = 0.001
+count_confidence = 0.99
+# Relative standard error of the number of distinct words
+distinct_error = 0.01
+# Number of candidate top words kept per year; large enough for the top
+# words to remain after the stop words are left out
+heavy_hitters = 500
+# Number of songs added to the sketches at once
+sketch_songs = 2000
+
+
+# Mix 64 bit values into well distributed hashes (splitmix64)
+def mix64(values):
+    with np.errstate(over='ignore'):
+        z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+        return z ^ (z >> np.uint64(31))
+
+# Stable 64 bit hashes of words, the same in every process
+def word_hashes(words):
+    return np.array([
+        int.from_bytes(hashlib.blake2b(str(word).encode(), digest_size=8).digest(), 'little')
+        for word in words
+    ], dtype=np.uint64)
+
+# Number of bits needed for every value of a uint64 array
+def bit_length(values):
+    lengths = np.zeros(len(values), dtype=np.int64)
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        lengths[high] += shift
+        values[high] >>= np.uint64(shift)
+
+    return lengths + (values > 0)
+
+
+# HyperLogLog counter of distinct values with a fixed number of registers
+# chosen from the relative standard error
+class HyperLogLog:
+    def __init__(self, error=distinct_error):
+        self.precision = int(np.clip(np.ceil(np.log2((1.04 / error) ** 2)), 4, 18))
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    # Add hashed values
+    def add(self, hashes):
+        hashes = mix64(hashes)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # Position of the first set bit in the rest of the hash
+        rest = hashes << np.uint64(self.precision)
+        rank = np.minimum(65 - bit_length(rest), 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    # Estimated number of distinct values added
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        # Linear counting is more accurate while many registers are empty
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+
+        return int(round(estimate))
+
+
+# Count-Min sketch of value counts: the estimate of a count is never too low
+# and too high by at most error times the total count with the given
+# confidence
+class CountMinSketch:
+    def __init__(self, error=count_error, confidence=count_confidence):
+        self.width = int(np.ceil(np.e / error))
+        self.depth = int(np.ceil(np.log(1 / (1 - confidence))))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.seeds = mix64(np.arange(self.depth, dtype=np.uint64) + np.uint64(1))
+
+    # Column of every hashed value in every row
+    def columns(self, hashes):
+        return np.stack([
+            (mix64(hashes ^ seed) % np.uint64(self.width)).astype(np.int64)
+            for seed in self.seeds
+        ])
+
+    # Add the counts of hashed values
+    def add(self, hashes, counts):
+        for row, columns in enumerate(self.columns(hashes)):
+            np.add.at(self.table[row], columns, counts)
+
+    # Estimated counts of hashed values
+    def estimate(self, hashes):
+        if not len(hashes):
+            return np.zeros(0, dtype=np.int64)
+
+        return self.table[np.arange(self.depth)[:, None], self.columns(hashes)].min(axis=0)
+
+
+# Approximate word counts per release year for corpora too large for exact
+# counts: a Count-Min sketch and the candidate top words per year and
+# overall, and a HyperLogLog counter of the distinct words. Words are hashed
+# directly, so no vocabulary is kept and memory only depends on the error
+# bounds and the number of years. Answers the queries of YearCounts
+class YearSketches:
+    def __init__(self, error=count_error, confidence=count_confidence,
+                 capacity=heavy_hitters, distinct=distinct_error):
+        self.error = error
+        self.confidence = confidence
+        self.capacity = capacity
+        self.distinct = HyperLogLog(distinct)
+        self.excluded = frozenset()
+        self.excluded_counts = 0
+
+        # Sketches, candidate words with their hashes and totals by year and
+        # for 'overall'
+        self.sketches = {}
+        self.candidates = {}
+        self.year_totals = {}
+
+    # Add the songs of a DataFrame chunk with their tokens; every distinct
+    # word of the chunk is hashed once
+    def add(self, df, tokens):
+        song_years = df['ReleaseDate'].dt.year.to_numpy().astype(np.int64)
+        rows = tokens.rows(df.index)
+        lengths = tokens.offsets[rows + 1] - tokens.offsets[rows]
+        ids = tokens.select(df.index)
+
+        # Number the words used in the chunk without sorting all tokens
+        present = np.zeros(len(tokens.vocab), dtype=bool)
+        present[ids] = True
+        used = np.flatnonzero(present)
+        inverse = (np.cumsum(present) - 1)[ids]
+        words = np.array(tokens.vocab[used], dtype=str)
+        hashes = word_hashes(words)
+
+        # Count every word per year in the chunk
+        keys, counts = np.unique(
+            (np.repeat(song_years, lengths) << 32) | inverse, return_counts=True
+        )
+        key_years = keys >> 32
+        key_words = keys & 0xFFFFFFFF
+
+        for year in np.unique(key_years):
+            found = key_years == year
+            ids = key_words[found]
+            self.update(str(year), words[ids], hashes[ids], counts[found])
+
+        self.update('overall', words, hashes, np.bincount(inverse, minlength=len(used)))
+        self.distinct.add(hashes)
+
+    # Add word counts to the sketch of a year and keep the words with the
+    # highest estimates as its candidate top words, ties in word order
+    def update(self, year, words, hashes, counts):
+        if year not in self.sketches:
+            self.sketches[year] = CountMinSketch(self.error, self.confidence)
+            self.candidates[year] = (np.empty(0, dtype=str), np.empty(0, dtype=np.uint64))
+            self.year_totals[year] = 0
+
+        sketch = self.sketches[year]
+        sketch.add(hashes, counts)
+        self.year_totals[year] += int(counts.sum())
+
+        known_words, known_hashes = self.candidates[year]
+        hashes, first = np.unique(np.concatenate([known_hashes, hashes]), return_index=True)
+        words = np.concatenate([known_words, words])[first]
+        keep = np.lexsort((words, -sketch.estimate(hashes)))[:self.capacity]
+        self.candidates[year] = (words[keep], hashes[keep])
+
+    # Years in order
+    @property
+    def years(self):
+        return sorted(year for year in self.sketches if year != 'overall')
+
+    # Estimated number of counted words per year, leaving out excluded words
+    @property
+    def totals(self):
+        totals = np.array([self.year_totals[year] for year in self.years], dtype=np.int64)
+
+        return np.maximum(totals - self.excluded_counts, 0)
+
+    # Estimated counts of several words in every year, with one column per
+    # word; excluded words count zero unless include is set
+    def columns(self, words, include=False):
+        hashes = word_hashes(words)
+        counts = np.stack([
+            self.sketches[year].estimate(hashes) for year in self.years
+        ]) if self.years else np.zeros((0, len(words)), dtype=np.int64)
+
+        if not include and self.excluded:
+            counts[:, [word in self.excluded for word in words]] = 0
+
+        return counts.reshape(len(self.years), len(words))
+
+    # Most common words and their estimated counts for a year or 'overall'
+    def top_words(self, ref_year, number):
+        if ref_year not in self.sketches:
+            return []
+
+        words, hashes = self.candidates[ref_year]
+        found = np.array([word not in self.excluded for word in words], dtype=bool)
+        words, hashes = words[found], hashes[found]
+        estimates = self.sketches[ref_year].estimate(hashes)
+        top = np.lexsort((words, -estimates))[:number]
+
+        return list(zip(words[top].tolist(), estimates[top].tolist()))
+
+    # Share of several words in percent of all counted words for every year,
+    # with one column per word
+    def column_shares(self, words):
+        totals = self.totals[:, None]
+
+        return np.divide(
+            self.columns(words) * 100, totals,
+            out=np.zeros((len(self.years), len(words))), where=totals > 0
+        )
+
+    # Share of a word in percent of all counted words for every year
+    def share(self, word):
+        return self.column_shares([word])[:, 0]
+
+    # Long format table with the share of every given word in every year
+    def shares(self, words):
+        freq = self.column_shares(words)
+
+        return pd.DataFrame({
+            'Year': np.repeat(self.years, len(words)),
+            'Word': np.tile(list(words), len(self.years)),
+            'Frequency': freq.ravel()
+        })
+
+    # Estimated number of distinct words
+    def unique_words(self):
+        return self.distinct.count()
+
+    # Same sketches with the given words, e.g. stop words, left out of the
+    # answers; without a vocabulary, the counts of excluded words that never
+    # occur are estimated as well, which only adds their collisions
+    def exclude(self, words):
+        view = YearSketches.__new__(YearSketches)
+        view.__dict__.update(self.__dict__)
+        view.excluded = self.excluded | frozenset(words or ())
+        view.excluded_counts = view.columns(sorted(view.excluded), True).sum(axis=1)
+
+        return view
+
+
+# Build the sketches for all songs of a token store, adding a chunk of songs
+# at a time
+def build_year_sketches(df, tokens, error=count_error, capacity=heavy_hitters,
+                        rows=sketch_songs):
+    sketches = YearSketches(error, capacity=capacity)
+    for start in range(0, len(df), rows):
+        sketches.add(df.iloc[start:start + rows], tokens)
+
+    return sketches
+
+# Store the sketches in a single .npz file
+def write_year_sketches(sketches, save_path):
+    years = sorted(sketches.sketches)
+    words = [np.empty(0, dtype=str)] + [sketches.candidates[year][0] for year in years]
+
+    np.savez(
+        save_path, years=np.array(years, dtype=str),
+        error=sketches.error, confidence=sketches.confidence,
+        capacity=sketches.capacity, registers=sketches.distinct.registers,
+        tables=np.array([sketches.sketches[year].table for year in years]),
+        totals=np.array([sketches.year_totals[year] for year in years], dtype=np.int64),
+        words=np.concatenate(words),
+        hashes=np.concatenate(
+            [np.empty(0, dtype=np.uint64)] + [sketches.candidates[year][1] for year in years]
+        ),
+        lengths=np.array([len(year_words) for year_words in words[1:]], dtype=np.int64)
+    )
+
+# Load the sketches stored with write_year_sketches
+def read_year_sketches(save_path):
+    with np.load(save_path) as arrays:
+        sketches = YearSketches(
+            float(arrays['error']), float(arrays['confidence']), int(arrays['capacity'])
+        )
+        sketches.distinct.registers = arrays['registers']
+        sketches.distinct.precision = int(np.log2(len(arrays['registers'])))
+
+        ends = np.cumsum(arrays['lengths'])
+        for i, year in enumerate(arrays['years'].tolist()):
+            sketch = CountMinSketch(sketches.error, sketches.confidence)
+            sketch.table = arrays['tables'][i]
+            sketches.sketches[year] = sketch
+            sketches.year_totals[year] = int(arrays['totals'][i])
+            sketches.candidates[year] = (
+                arrays['words'][ends[i] - arrays['lengths'][i]:ends[i]],
+                arrays['hashes'][ends[i] - arrays['lengths'][i]:ends[i]]
+            )
+
+    return sketches
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import json
+from pathlib import Path
+import threading
+
+
+# Define archive parameters
+# Name of the archive directory inside the lyrics directory
+archive_dir = 'archive'
+# Size in bytes after which the writer starts a new shard
+shard_bytes = 64 * 1024 * 1024
+# File names of the shards and the suffix of their index files
+shard_name = 'shard_{:05d}.jsonl'
+index_suffix = '.idx'
+
+
+# Append-only archive of song records: records are appended as JSON lines
+# to a few large shards, and every shard has an index file with one line of
+# key, offset and length per record. A key appended again replaces the
+# earlier record; appends are thread-safe
+class SongArchive:
+    def __init__(self, archive_path, shard_bytes=shard_bytes):
+        self.archive_path = Path(archive_path)
+        self.archive_path.mkdir(parents=True, exist_ok=True)
+        self.shard_bytes = shard_bytes
+        self.lock = threading.Lock()
+
+        # Continue the last shard
+        shards = shard_paths(self.archive_path)
+        self.open(len(shards) - 1 if shards else 0)
+
+    # Open a shard for appending
+    def open(self, number):
+        self.shard_path = self.archive_path.joinpath(shard_name.format(number))
+        self.number = number
+
+        # Cut off an index line torn by an interrupted write
+        index_path = self.shard_path.with_suffix(index_suffix)
+        if index_path.exists():
+            data = index_path.read_bytes()
+            if data and not data.endswith(b'\n'):
+                index_path.write_bytes(data[:data.rfind(b'\n') + 1])
+
+        self.shard = open(self.shard_path, 'ab')
+        self.index = open(index_path, 'a')
+        # New records start after all bytes in the shard, including the ones
+        # of a record whose index line was never written
+        self.size = self.shard.tell()
+
+    # Append a record under a key, e.g. the Genius song ID; returns the path
+    # of the shard holding it
+    def append(self, key, record):
+        line = (json.dumps(dict(record, Key=key), ensure_ascii=False) + '\n').encode()
+
+        with self.lock:
+            if self.size and self.size + len(line) > self.shard_bytes:
+                self.close()
+                self.open(self.number + 1)
+
+            # The record is on disk before it is indexed
+            self.shard.write(line)
+            self.shard.flush()
+            self.index.write('{}\t{}\t{}\n'.format(key, self.size, len(line)))
+            self.index.flush()
+            self.size += len(line)
+
+            return self.shard_path
+
+    def close(self):
+        self.shard.close()
+        self.index.close()
+
+
+# Paths of all shards of an archive in order
+def shard_paths(archive_path):
+    return sorted(Path(archive_path).glob(shard_name.replace('{:05d}', '*')))
+
+# Read the index of a shard starting at the given line; returns a list of
+# key, offset and length and the total number of complete lines
+def read_index(shard_path, start=0):
+    entries = []
+    count = 0
+
+    try:
+        with open(shard_path.with_suffix(index_suffix)) as file:
+            for count, line in enumerate(file, 1):
+                # A line without newline was torn by an interrupted write
+                if not line.endswith('\n'):
+                    count -= 1
+                    break
+                if count > start:
+                    key, offset, length = line.split('\t')
+                    entries.append((key, int(offset), int(length)))
+    except FileNotFoundError:
+        pass
+
+    return entries, count
+
+# Latest entry of every key in the archive as pairs of shard path and index
+# entry; with start, only index lines after the given number of lines per
+# shard name are read. Also returns the number of index lines per shard
+def archive_entries(archive_path, start=None):
+    start = start or {}
+    latest = {}
+    counts = {}
+
+    for shard_path in shard_paths(archive_path):
+        entries, counts[shard_path.name] = read_index(
+            shard_path, start.get(shard_path.name, 0)
+        )
+        for entry in entries:
+            latest[entry[0]] = (shard_path, entry)
+
+    return latest, counts
+
+# Read the records of the given index entries of a shard in a single pass
+# over the bytes they span; yields pairs of key and record
+def read_records(shard_path, entries):
+    entries = sorted(entries, key=lambda entry: entry[1])
+    if not entries:
+        return
+
+    start = entries[0][1]
+    end = max(offset + length for key, offset, length in entries)
+    with open(shard_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    for key, offset, length in entries:
+        record = json.loads(data[offset - start:offset - start + length])
+        del record['Key']
+        yield key, record
@@ -2,12 +2,10 @@
 
 
 # Import statements go here
-from collections import Counter, defaultdict
+from collections import defaultdict
 from io import StringIO
-from nltk.corpus import stopwords
 import pandas as pd
 from pathlib import Path
-import re
 
 from nltk import pos_tag
 from nltk.collocations import BigramAssocMeasures, BigramCollocationFinder
@@ -23,93 +21,13 @@ from bokeh.plotting import figure
 
 
 # Function to draw the whole tab
-def tab_ngrams(df, plot_width, plot_height):
-
-    # Copied functions from tab_word_usage (temporary)
-    # Count word frequency in all songs excluding stopwords
-    def word_frequency(df, lang='english'):
-        # Import stop words from nltk corpus
-        stop_words = set(stopwords.words(lang))
-
-        words_ctn = Counter()
-
-        for song in df['Lyrics']:
-            words_ctn.update([w for w in re.findall(r'\w+\'*\w*', song.lower()) if w not in stop_words])
-
-        # Return the counter with all words and their numbers of occurence
-        return words_ctn
-
-    # Find all years in dataset and put into a set
-    def all_years(df):
-        years = set()
-        for date in df['ReleaseDate']:
-            years.update(re.findall(r'[0-9]{4}', str(date)))
-
-        return sorted(list(years))
-
-    # Count word frequency for individual years
-    def word_freq_years(df, years, lang='english'):
-        df = df.set_index(df['ReleaseDate']).sort_index()
-
-        years_freq = []
-        years_total = []
-        for year in years:
-            # Append the counter with all words and their numbers of occurence
-            # for the specified year
-            years_freq.append(word_frequency(df[year], lang))
-            # Append the sum of all values in the counter giving the total
-            # number of words minus stop words for that year
-            years_total.append(sum(word_frequency(df[year], lang).values()))
-
-        df_freq = pd.DataFrame(
-            {'FreqCtn': years_freq, 'Total': years_total},
-            index=years
-        ).sort_index()
-
-        return df_freq
-
-    # Find the top words and their frequency of occurence for a given time
-    def top_freq_years(df, years, ref_year, number, lang='english'):
-        df_freq = word_freq_years(df, years, lang)
-
-        # Find the most common words for the reference year or all years
-        if ref_year == 'overall':
-            top_words = word_frequency(df, lang).most_common(number)
-        else:
-            top_words = df_freq.loc[ref_year, 'FreqCtn'].most_common(number)
-
-        words, count = zip(*top_words)
-
-        freq_dict = {}
-
-        for word in words:
-            word_counts = []
-            for year in df_freq.index.tolist():
-                word_counts.append((df_freq.loc[year, 'FreqCtn'][word] / df_freq.loc[year, 'Total']) * 100)
-            freq_dict.update({word: word_counts})
-
-        df = pd.DataFrame(freq_dict, index=df_freq.index)
-        df.columns.name = 'Word'
-        df.index.name = 'Year'
-
-        # Reshape to 1D array or frequency with a word and year for each row
-        df = pd.DataFrame(df.stack(), columns=['Frequency']).reset_index()
-
-        return ColumnDataSource(df), words
-
+def tab_ngrams(df, analytics, plot_width, plot_height):
 
     # Functions for generation of data sources
 
-    # Tokenize lyrics and return a list of tokens stripped of stopwords
-    def tokenize(df, lang='english'):
-        # Import stop words from nltk corpus
-        stop_words = set(stopwords.words(lang))
-
-        words = []
-        for song in df['Lyrics']:
-            words.extend([w for w in re.findall(r'\w+\'*\w*', song.lower()) if w not in stop_words])
-
-        return words
+    # Return the list of tokens of all songs stripped of stopwords
+    def tokenize(lang=None):
+        return analytics.words(lang)
 
     # Filter for bigrams to only show words with accepted POS tags
     def filter_bigrams(bigram):
@@ -223,16 +141,11 @@ def tab_ngrams(df, plot_width, plot_height):
         return ColumnDataSource(df)
 
     # Find the frequency of occurence for a given word over all years
-    def freq_over_years(df, word, years, lang='english'):
-        df_freq = word_freq_years(df, years, lang)
-
-        word_counts = []
-        # Find the frequency of occurence for the given word in every year
-        for year in df_freq.index.tolist():
-            word_counts.append((df_freq.loc[year, 'FreqCtn'][word] / df_freq.loc[year, 'Total']) * 100)
-
-        df = pd.DataFrame({'Word': word_counts}, index=df_freq.index)
-        df.index.name = 'Year'
+    def freq_over_years(word):
+        df = pd.DataFrame(
+            {'Word': analytics.share(word)},
+            index=pd.Index(analytics.word_counts().years, name='Year')
+        )
 
         return ColumnDataSource(df)
 
@@ -340,26 +253,25 @@ def tab_ngrams(df, plot_width, plot_height):
         plot.add_layout(legend)
         plot.legend.click_policy="hide"
 
-    # Function to update the word trends to specific words
-    def update_trends(attr, old, new):
-        # Update all three ColumnDataSource in plot
-        for src, input in zip(
-            [src01_trends, src02_trends, src03_trends],
-            [w01_input, w02_input, w03_input]
-        ):
-            src_new = freq_over_years(df, input.value, all_years(df))
+    # Function to create the callback updating the word trend of one input;
+    # only the series of the changed word is recomputed
+    def update_trends(src):
+        def update(attr, old, new):
+            src_new = freq_over_years(new)
             src.data.update(src_new.data)
 
-        # Destroy existing legend and then add new legend with new values
-        word_trends.legend.items = []
-        add_legend(word_trends, w01_input.value, w02_input.value, w03_input.value)
+            # Destroy existing legend and then add new legend with new values
+            word_trends.legend.items = []
+            add_legend(word_trends, w01_input.value, w02_input.value, w03_input.value)
+
+        return update
 
 
     # # temp functions for testing
-    # bigrams = find_bigrams(tokenize(df, 'english'), 10, 't', pos_filter=True)
+    # bigrams = find_bigrams(tokenize(), 10, 't', pos_filter=True)
     # print(bigrams.head())
     #
-    # word_list = word_links(tokenize(df), 5, method='PMI')
+    # word_list = word_links(tokenize(), 5, method='PMI')
     # print('love', word_list['love'][:5])
 
 
@@ -369,9 +281,9 @@ def tab_ngrams(df, plot_width, plot_height):
     w02 = 'lord'
     w03 = 'jesus'
 
-    src01_trends = freq_over_years(df, w01, all_years(df))
-    src02_trends = freq_over_years(df, w02, all_years(df))
-    src03_trends = freq_over_years(df, w03, all_years(df))
+    src01_trends = freq_over_years(w01)
+    src02_trends = freq_over_years(w02)
+    src03_trends = freq_over_years(w03)
 
     word_trends = plot_word_trends(
         src01_trends, src02_trends, src03_trends,
@@ -383,17 +295,17 @@ def tab_ngrams(df, plot_width, plot_height):
 
     # Create three text input widget for displaying three words individually
     w01_input = TextInput(title='Word No. 1:', value=w01, placeholder='type here')
-    w01_input.on_change('value', update_trends)
+    w01_input.on_change('value', update_trends(src01_trends))
     w02_input = TextInput(title='Word No. 2:', value=w02, placeholder='type here')
-    w02_input.on_change('value', update_trends)
+    w02_input.on_change('value', update_trends(src02_trends))
     w03_input = TextInput(title='Word No. 3:', value=w03, placeholder='type here')
-    w03_input.on_change('value', update_trends)
+    w03_input.on_change('value', update_trends(src03_trends))
 
     # Create plot 2 for the most popular words and their closest links
     num_links = 10
-    words = top_freq_years(df, all_years(df), 'overall', 10)[1]
+    words = analytics.top_freq_years('overall', 10)[1]
     src_links = freq_links(
-        word_links(tokenize(df), 5, method='PMI'),
+        word_links(tokenize(), 5, method='PMI'),
         words,
         num_links=num_links
     )
@@ -19,6 +19,8 @@ from bokeh.palettes import RdPu9
 from bokeh.plotting import figure
 from bokeh.transform import jitter
 
+from scripts.scatter_bins import BinnedScatter
+
 ###
 # #temp
 # from collect_lyrics_data import proj_dir
@@ -252,22 +254,36 @@ def plot_hit_songs(src, mapper, plot_width, plot_height):
 # Plot the songs according to ReleaseDate in form of the image of Bob Dylan
 # The newer the song, the higher on the y-axis; color gives number of unique words
 def plot_words_date(src, mapper, plot_width, plot_height):
-    source = ColumnDataSource(src)
+    # Send only the metadata of the songs, binned for large numbers of songs
+    songs = BinnedScatter(
+        src, 'x', 'y', ['SongTitle', 'ReleaseDate'], 'WordsUsed'
+    )
 
     # Create the empty figure
     plot = figure(
         plot_width=plot_width * 2,
         plot_height=plot_height * 2,
-        title='When did Bob Dylan talk the most? (or unique words per song over time)'
+        title='When did Bob Dylan talk the most? (or unique words per song over time)',
+        tools='pan, wheel_zoom, box_zoom, reset, save',
+        active_scroll='wheel_zoom'
     )
 
     # Add a circle glyph for all songs
-    plot.circle(
-        x='x', y='y', source=source,
+    circles = plot.circle(
+        x='x', y='y', source=songs.point_source,
         size=6, alpha=0.9, color={'field': 'WordsUsed', 'transform': mapper},
         hover_color='firebrick'
     )
 
+    # Add a rect glyph for the bins shown instead of single songs, colored by
+    # the mean number of unique words
+    bins = plot.rect(
+        x='x', y='y', width='width', height='height', source=songs.bin_source,
+        fill_color={'field': 'WordsUsed', 'transform': mapper}, fill_alpha=0.9,
+        line_color=None, hover_fill_color='firebrick'
+    )
+    songs.link(plot)
+
     # Add a hover tool
     hover = HoverTool(
         tooltips=[
@@ -275,10 +291,20 @@ def plot_words_date(src, mapper, plot_width, plot_height):
             ('Release Date', '@ReleaseDate{%F}'),
             ('Unique words', '@WordsUsed')
         ],
-        formatters={'ReleaseDate': 'datetime'}
+        formatters={'ReleaseDate': 'datetime'},
+        renderers=[circles]
     )
 
-    plot.add_tools(hover)
+    # Add a hover tool for the bins
+    hover_bins = HoverTool(
+        tooltips=[
+            ('Songs', '@count'),
+            ('Mean unique words', '@WordsUsed{0.0}')
+        ],
+        renderers=[bins]
+    )
+
+    plot.add_tools(hover, hover_bins)
 
     # Add a color bar
     color_bar = ColorBar(
@@ -304,7 +330,7 @@ def plot_words_date(src, mapper, plot_width, plot_height):
     plot.grid.grid_line_color = None
     plot.axis.axis_line_color = None
     plot.xaxis.visible = False
-    plot.toolbar_location = None
+    plot.toolbar.logo = None
     plot.background_fill_color = 'beige'
     plot.background_fill_alpha = 0.3
 
@@ -2,12 +2,8 @@
 
 
 # Import statements go here
-from collections import Counter
 from io import StringIO
-from nltk.corpus import stopwords
-import pandas as pd
 from pathlib import Path
-import re
 
 from bokeh.layouts import column, layout, widgetbox
 from bokeh.models import (
@@ -19,6 +15,8 @@ from bokeh.palettes import magma, RdPu9
 from bokeh.plotting import figure
 from bokeh.transform import jitter
 
+from scripts.scatter_bins import BinnedScatter, grid_bins
+
 # #temp
 # from collect_lyrics_data import proj_dir
 # from bokeh.io import show
@@ -37,19 +35,10 @@ from bokeh.transform import jitter
 
 
 # Function to draw the whole tab
-def tab_word_usage(df, plot_width, plot_height):
+def tab_word_usage(df, analytics, plot_width, plot_height):
 
     # Functions for generation of data sources
 
-    # Tokenize lyrics into single words and all individual words used
-    def count_words(df):
-        words_ctn = Counter()
-
-        for song in df['Lyrics']:
-            words_ctn.update(re.findall(r'\w+\'*\w*', song.lower()))
-
-        return words_ctn
-
     # Tokenize lyrics into single words for songs
     def song_words(df):
         # Attach a y column with constant value for use in plot
@@ -59,87 +48,27 @@ def tab_word_usage(df, plot_width, plot_height):
         df['PageviewsScaled'] = (df['Pageviews'] / df['Pageviews'].sum()) * 500 + 4
 
         # Group DataFrame by artists and calculate mean
-        df_artists = df.groupby('Artist', as_index=False).mean()
+        df_artists = df.groupby('Artist', as_index=False)[['WordsUsed']].mean()
 
         # Calculate overall mean for words used in songs
         avg = df['WordsUsed'].mean()
 
-        return ColumnDataSource(df), ColumnDataSource(df_artists), avg
-
-    # Count word frequency in all songs excluding stopwords
-    def word_frequency(df, lang='english'):
-        # Import stop words from nltk corpus
-        stop_words = set(stopwords.words(lang))
-
-        words_ctn = Counter()
-
-        for song in df['Lyrics']:
-            words_ctn.update(
-                [w for w in re.findall(r'\w+\'*\w*', song.lower()) if w not in stop_words]
-            )
-
-        # Return the counter with all words and their numbers of occurence
-        return words_ctn
-
-    # Find all years in dataset and put into a set
-    def all_years(df):
-        years = set()
-        for date in df['ReleaseDate']:
-            years.update(re.findall(r'[0-9]{4}', str(date)))
-
-        return sorted(list(years))
-
-    # Count word frequency for individual years
-    def word_freq_years(df, years, lang='english'):
-        df = df.set_index(df['ReleaseDate']).sort_index()
-
-        years_freq = []
-        years_total = []
-        for year in years:
-            # Append the counter with all words and their numbers of occurence
-            # for the specified year
-            years_freq.append(word_frequency(df[year], lang))
-            # Append the sum of all values in the counter giving the total
-            # number of words minus stop words for that year
-            years_total.append(sum(word_frequency(df[year], lang).values()))
-
-        df_freq = pd.DataFrame(
-            {'FreqCtn': years_freq, 'Total': years_total},
-            index=years
-        ).sort_index()
+        # Send only the metadata of the songs, binned along the number of
+        # words for large numbers of songs
+        songs = BinnedScatter(
+            df, 'WordsUsed', 'y',
+            ['SongTitle', 'Artist', 'Pageviews', 'PageviewsScaled'], 'Pageviews',
+            bins=(grid_bins[0], 1), y_range=(0.85, 1.2)
+        )
 
-        return df_freq
+        return songs, ColumnDataSource(df_artists), avg
 
     # Find the top words and their frequency of occurence for a given time
-    def top_freq_years(df, years, ref_year, number, lang='english'):
-        df_freq = word_freq_years(df, years, lang)
+    # from the tables prepared by the shared analytics
+    def top_freq_years(ref_year, number):
+        data, words = analytics.top_freq_years(ref_year, number)
 
-        # Find the most common words for the reference year or all years
-        if ref_year == 'overall':
-            top_words = word_frequency(df, lang).most_common(number)
-        else:
-            top_words = df_freq.loc[ref_year, 'FreqCtn'].most_common(number)
-
-        words, count = zip(*top_words)
-
-        freq_dict = {}
-
-        for word in words:
-            word_counts = []
-            for year in df_freq.index.tolist():
-                word_counts.append(
-                    (df_freq.loc[year, 'FreqCtn'][word] / df_freq.loc[year, 'Total']) * 100
-                )
-            freq_dict.update({word: word_counts})
-
-        df = pd.DataFrame(freq_dict, index=df_freq.index)
-        df.columns.name = 'Word'
-        df.index.name = 'Year'
-
-        # Reshape to 1D array or frequency with a word and year for each row
-        df = pd.DataFrame(df.stack(), columns=['Frequency']).reset_index()
-
-        return ColumnDataSource(df), words
+        return ColumnDataSource(data=dict(data)), words
 
 
     # Functions for plotting the data
@@ -193,11 +122,21 @@ def tab_word_usage(df, plot_width, plot_height):
 
         # Add the circle glyph for all songs
         songs = plot.circle(
-            x='WordsUsed', y=jitter('y', width=0.25), source=src[0],
+            x='WordsUsed', y=jitter('y', width=0.25), source=src[0].point_source,
             size='PageviewsScaled', alpha=0.7, color='salmon',
             hover_color='firebrick'
         )
 
+        # Add a rect glyph for the bins shown instead of single songs, the
+        # more songs the darker
+        mapper = LinearColorMapper(palette=list(reversed(RdPu9)), low=0)
+        bins = plot.rect(
+            x='x', y='y', width='width', height='height', source=src[0].bin_source,
+            fill_color={'field': 'count', 'transform': mapper}, fill_alpha=0.8,
+            line_color=None, hover_fill_color='firebrick'
+        )
+        src[0].link(plot)
+
         # Add only for projects with multiple artists
         # # Add a circle glyph for artists and the average number of words used
         # artists = plot.circle(
@@ -232,6 +171,16 @@ def tab_word_usage(df, plot_width, plot_height):
             renderers=[songs]
         )
 
+        # Add a hover tool for the bins
+        hover_bins = HoverTool(
+            tooltips=[
+                ('Songs', '@count'),
+                ('Words used', '~@x{0}'),
+                ('Mean pageviews', '@Pageviews{0,0}')
+            ],
+            renderers=[bins]
+        )
+
         # Add only for projects with multiple artists
         # # Add a hover tool for the artists
         # hover_artists = HoverTool(
@@ -242,7 +191,7 @@ def tab_word_usage(df, plot_width, plot_height):
         #     renderers=[artists]
         # )
 
-        plot.add_tools(hover_songs)
+        plot.add_tools(hover_songs, hover_bins)
 
         # Style the visual properties of the plot
         plot.yaxis.visible = False
@@ -299,19 +248,18 @@ def tab_word_usage(df, plot_width, plot_height):
         return plot
 
 
-    # Function to update the word frequency over years plot
+    # Function to update the word frequency over years plot by swapping in
+    # the prepared columns of the selected time
     def update_freq(attr, old, new):
-        new_src, new_words = top_freq_years(
-            df, years, year_select.value, 10, 'english'
-        )
+        new_data, new_words = analytics.top_freq_years(year_select.value, 10)
 
-        src_freq.data.update(new_src.data)
+        src_freq.data = dict(new_data)
         freq_table.y_range.factors = (list(reversed(new_words)))
 
 
     # Create plot 1 for total number of unique words in all songs
     total_words = plot_nums(
-        len(count_words(df)),
+        analytics.unique_words(),
         'Number of unique words in all songs',
         plot_width, plot_height * 0.8
     )
@@ -326,7 +274,7 @@ def tab_word_usage(df, plot_width, plot_height):
 
     # Create plot 3 for frequency table for top words in selected time
     # Years to use for analysis
-    years = all_years(df)
+    years = analytics.years()
 
     # Add a Select widget for selecting the displayed year
     # Make a copy of years to be able to insert 'overall' without changing the
@@ -341,7 +289,7 @@ def tab_word_usage(df, plot_width, plot_height):
     year_select.on_change('value', update_freq)
 
     # Data source for the plot
-    src_freq, words = top_freq_years(df, years, 'overall', 10, 'english')
+    src_freq, words = top_freq_years('overall', 10)
 
     freq_table = plot_top_freq_yrs(
         src_freq, words, years,
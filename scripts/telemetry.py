@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from collections import Counter, defaultdict
+import json
+import numpy as np
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# Define telemetry parameters
+# Upper edges of the latency histogram bins in milliseconds
+latency_bins = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+# Width of the longest histogram bar in characters
+bar_width = 40
+
+
+# Recorder writing one JSON line per request and keeping per-endpoint
+# numbers for the summary; shared by all threads of a crawl
+class Telemetry:
+    def __init__(self, path=None, endpoints=()):
+        # Line buffered, so every request is on disk while the crawl runs
+        self.file = open(path, 'w', buffering=1) if path else None
+        self.endpoints = [(re.compile(pattern), name) for pattern, name in endpoints]
+        self.lock = threading.Lock()
+        self.t_start = time.time()
+
+        self.totals = defaultdict(Counter)
+        self.latencies = defaultdict(list)
+
+    # Name of the endpoint of a url from the first matching pattern
+    def endpoint(self, url):
+        for pattern, name in self.endpoints:
+            if pattern.search(url):
+                return name
+
+        return urlsplit(url).netloc
+
+    # Record a request with its status, latency in seconds, size in bytes,
+    # retries and waits; client_wait is the time the client held the request
+    # back, e.g. for its rate limiter. Requests served from the cache have
+    # source 'cache'
+    def record(self, url, status=None, latency=0.0, size=0, retries=0,
+               backoff=0.0, rate_limit_wait=0.0, client_wait=0.0,
+               source='network', error=None):
+        entry = {
+            'time': round(time.time() - self.t_start, 4),
+            'endpoint': self.endpoint(url),
+            'url': url,
+            'status': status,
+            'latency': round(latency, 6),
+            'bytes': size,
+            'retries': retries,
+            'backoff': round(backoff, 4),
+            'rate_limit_wait': round(rate_limit_wait, 4),
+            'client_wait': round(client_wait, 4),
+            'source': source,
+            'error': error
+        }
+
+        with self.lock:
+            if self.file is not None:
+                print(json.dumps(entry), file=self.file)
+
+            totals = self.totals[entry['endpoint']]
+            totals[source] += 1
+            totals['errors'] += int(status is None or status >= 400)
+            totals['retries'] += retries
+            totals['backoff'] += backoff
+            totals['rate_limit_wait'] += rate_limit_wait
+            totals['client_wait'] += client_wait
+            totals['bytes'] += size
+            if source == 'network':
+                self.latencies[entry['endpoint']].append(latency * 1000)
+
+    # Text summary with the numbers and a latency histogram per endpoint
+    def summary(self):
+        lines = []
+        with self.lock:
+            for endpoint in sorted(self.totals):
+                totals = self.totals[endpoint]
+                latencies = np.array(self.latencies[endpoint])
+
+                lines.append(
+                    'Endpoint {}: {} requests, {} from cache, {} errors, {} retries, '
+                    '{:.1f} s backoff, {:.1f} s rate limit wait, {:.1f} s client wait, '
+                    '{:.1f} kB'.format(
+                        endpoint, totals['network'], totals['cache'], totals['errors'],
+                        totals['retries'], totals['backoff'], totals['rate_limit_wait'],
+                        totals['client_wait'], totals['bytes'] / 1000
+                    )
+                )
+                if len(latencies):
+                    lines.append('  Latency p50 {:.1f} ms, p90 {:.1f} ms, p99 {:.1f} ms'.format(
+                        *np.percentile(latencies, [50, 90, 99])
+                    ))
+                    lines.extend(histogram(latencies))
+
+        return '\n'.join(lines)
+
+    # Close the file and return the summary
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+        return self.summary()
+
+
+# Recorder of the running crawl, None if telemetry is off
+recorder = None
+# Client waits per thread not yet recorded with a request
+pending = threading.local()
+
+
+# Text histogram of latencies in milliseconds
+def histogram(latencies):
+    edges = [0] + latency_bins + [np.inf]
+    counts, _ = np.histogram(latencies, bins=edges)
+    scale = bar_width / max(counts.max(), 1)
+
+    # Leave out empty bins at both ends
+    used = np.flatnonzero(counts)
+    lines = []
+    for i in range(used[0], used[-1] + 1):
+        label = '{}-{} ms'.format(edges[i], edges[i + 1]) if i < len(latency_bins) \
+            else '>{} ms'.format(edges[i])
+        lines.append('  {:>14} {:<{}} {}'.format(
+            label, '#' * int(np.ceil(counts[i] * scale)), bar_width, counts[i]
+        ))
+
+    return lines
+
+# Start recording requests into a JSON lines file
+def start(path, endpoints=()):
+    global recorder
+    recorder = Telemetry(path, endpoints)
+
+    return recorder
+
+# Note a wait of the client before its next request, e.g. for a rate limiter
+# or a fixed delay; it is recorded with the next request of the same thread
+def wait(seconds):
+    pending.wait = getattr(pending, 'wait', 0.0) + seconds
+
+# Record a request if telemetry is on, with the client waits of the thread
+# since its last request
+def record(url, **fields):
+    client_wait = getattr(pending, 'wait', 0.0)
+    pending.wait = 0.0
+
+    if recorder is not None:
+        recorder.record(url, client_wait=client_wait, **fields)
+
+# Stop recording and return the summary, empty if telemetry was off
+def stop():
+    global recorder
+    summary = recorder.close() if recorder is not None else ''
+    recorder = None
+
+    return summary
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from collections import Counter
+from itertools import chain
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from scripts.corpus_store import (
+    ArrayWriter, TextWriter, begin_store, commit_store, read_text, write_text
+)
+from scripts.tokenizer import get_tokenizer
+
+
+# Integer encoded tokens of all songs: a vocabulary table plus one flat
+# buffer of int32 token IDs, with offsets giving the tokens of every song
+class TokenStore:
+    def __init__(self, vocab, ids, offsets, index):
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    # Positions of the songs with the given labels, all songs for None
+    def rows(self, labels=None):
+        if labels is None:
+            return np.arange(len(self))
+
+        rows = self.index.get_indexer(labels)
+        if (rows < 0).any():
+            raise KeyError('Songs missing in token store')
+
+        return rows
+
+    # Token IDs of a single song by position
+    def song(self, row):
+        return self.ids[self.offsets[row]:self.offsets[row + 1]]
+
+    # Token IDs of the given songs joined in order
+    def select(self, labels=None):
+        if labels is None:
+            return np.asarray(self.ids)
+
+        # Gather the token slices of all songs with one fancy index
+        rows = self.rows(labels)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+
+        return np.asarray(self.ids)[np.arange(lengths.sum()) + shift]
+
+    # Boolean mask over the vocabulary marking the given words
+    def word_mask(self, words):
+        return np.isin(self.vocab, list(words))
+
+    # Number of occurences of every vocabulary entry in the given songs
+    def counts(self, labels=None, exclude=None):
+        counts = np.bincount(self.select(labels), minlength=len(self.vocab))
+        if exclude:
+            counts[self.word_mask(exclude)] = 0
+
+        return counts
+
+    # Counter with all words and their numbers of occurence in the given songs
+    def counter(self, labels=None, exclude=None):
+        counts = self.counts(labels, exclude)
+        used = np.flatnonzero(counts)
+
+        return Counter(dict(zip(self.vocab[used], counts[used].tolist())))
+
+    # List of all words of the given songs in order of appearance
+    def words(self, labels=None, exclude=None):
+        ids = self.select(labels)
+        if exclude:
+            ids = ids[~self.word_mask(exclude)[ids]]
+
+        return self.vocab[ids].tolist()
+
+    # Number of individual words used in every song
+    def words_used(self, labels=None):
+        rows = self.rows(labels)
+        lengths = self.offsets[rows + 1] - self.offsets[rows]
+        song_pos = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)
+        pairs = np.unique(
+            song_pos * len(self.vocab) + self.select(labels).astype(np.int64)
+        )
+
+        return np.bincount(pairs // max(len(self.vocab), 1), minlength=len(rows))
+
+    # New store without the songs with the given labels
+    def drop(self, labels):
+        keep = np.flatnonzero(~self.index.isin(labels))
+        lengths = self.offsets[keep + 1] - self.offsets[keep]
+        offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return TokenStore(
+            self.vocab, self.select(self.index[keep]), offsets, self.index[keep]
+        )
+
+    # New store with the tokenized lyrics appended, extending the vocabulary
+    # with all new words
+    def extend(self, lyrics, tokenizer=None):
+        lookup = {word: i for i, word in enumerate(self.vocab)}
+        new = encode(lyrics, lookup, tokenizer)
+
+        return TokenStore(
+            np.array(list(lookup), dtype=object),
+            np.concatenate([self.select(), new.ids]),
+            np.concatenate([self.offsets[:-1], self.offsets[-1] + new.offsets]),
+            self.index.append(new.index)
+        )
+
+
+# Chunked writer for the token store: lyrics are tokenized chunk by chunk
+# and only the vocabulary is held in memory. Starting from the vocabulary of
+# an existing store, its songs can be copied over without tokenizing them
+class TokenWriter:
+    def __init__(self, token_path, tokenizer=None, vocab=()):
+        self.token_path = Path(token_path)
+        self.tokenizer = tokenizer
+        self.tmp_path = begin_store(self.token_path)
+        self.lookup = {word: i for i, word in enumerate(vocab)}
+        self.total = 0
+
+        self.index = TextWriter(self.tmp_path, '_index')
+        self.ids = ArrayWriter(self.tmp_path, 'ids', np.int32)
+        self.offsets = ArrayWriter(self.tmp_path, 'offsets', np.int64)
+        self.offsets.append([0])
+
+    # Tokenize and write a Series of lyrics; the returned store of the chunk
+    # uses the IDs of the complete vocabulary
+    def append(self, lyrics):
+        chunk = encode(lyrics, self.lookup, self.tokenizer)
+
+        self.index.append(chunk.index)
+        self.ids.append(chunk.ids)
+        self.offsets.append(chunk.offsets[1:] + self.total)
+        self.total += len(chunk.ids)
+
+        return chunk
+
+    # Write the tokens of the given songs of a store whose vocabulary the
+    # writer started from
+    def copy(self, tokens, labels):
+        rows = tokens.rows(labels)
+        lengths = tokens.offsets[rows + 1] - tokens.offsets[rows]
+
+        self.index.append(labels)
+        self.ids.append(tokens.select(labels))
+        self.offsets.append(np.cumsum(lengths) + self.total)
+        self.total += int(lengths.sum())
+
+    # Complete vocabulary of all written songs
+    @property
+    def vocab(self):
+        return np.array(list(self.lookup), dtype=object)
+
+    def close(self):
+        self.index.close()
+        self.ids.close()
+        self.offsets.close()
+        write_text(list(self.lookup), self.tmp_path, 'vocab')
+
+        commit_store(self.tmp_path, self.token_path)
+
+
+# Tokenize lyrics in one batch and map every word to an ID in lookup, adding
+# new words in order of first appearance; only the distinct words of the
+# batch are looked up one by one
+def encode(lyrics, lookup, tokenizer=None):
+    words = (tokenizer or get_tokenizer()).split(lyrics)
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum([len(song) for song in words], out=offsets[1:])
+
+    codes, uniques = pd.factorize(
+        np.fromiter(chain.from_iterable(words), dtype=object, count=offsets[-1])
+    )
+    word_ids = np.array(
+        [lookup.setdefault(word, len(lookup)) for word in uniques], dtype=np.int32
+    )
+
+    return TokenStore(
+        np.array(list(lookup), dtype=object),
+        word_ids[codes],
+        offsets,
+        lyrics.index
+    )
+
+# Build the token store for a Series of lyrics
+def build_tokens(lyrics, tokenizer=None):
+    return encode(lyrics, {}, tokenizer)
+
+# Write the token store into its own directory
+def write_tokens(tokens, token_path):
+    token_path = Path(token_path)
+    tmp_path = begin_store(token_path)
+
+    write_text(tokens.index, tmp_path, '_index')
+    write_text(tokens.vocab, tmp_path, 'vocab')
+    np.save(tmp_path.joinpath('ids.npy'), np.asarray(tokens.ids, dtype=np.int32))
+    np.save(tmp_path.joinpath('offsets.npy'), np.asarray(tokens.offsets))
+
+    commit_store(tmp_path, token_path)
+
+# Load the token store with the token IDs memory-mapped
+def read_tokens(token_path):
+    token_path = Path(token_path)
+
+    return TokenStore(
+        read_text(token_path, 'vocab').to_series().to_numpy(),
+        np.load(token_path.joinpath('ids.npy'), mmap_mode='r'),
+        np.load(token_path.joinpath('offsets.npy')),
+        pd.Index(read_text(token_path, '_index').to_series(), name='File')
+    )
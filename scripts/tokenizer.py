@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from nltk.corpus import stopwords
+import os
+import pandas as pd
+import re
+import threading
+
+
+# Define tokenizer parameters
+# Pattern used to split lyrics into words
+word_pattern = re.compile(r'\w+\'*\w*')
+# Number of songs from which on lyrics are split in a pool of worker
+# processes, and the number of songs handed to a worker at once
+parallel_songs = 20000
+batch_songs = 5000
+
+# Stop word sets by language, each loaded from the nltk corpus only once
+stop_word_sets = {}
+stop_word_lock = threading.Lock()
+
+# Tokenizers by language shared by all callers
+tokenizers = {}
+
+
+# Splits lyrics into lower case words for a language: a whole Series is
+# split in one batch call, and stop words of the language can be left out
+class Tokenizer:
+    def __init__(self, lang='english', pattern=word_pattern, workers=None):
+        self.lang = lang
+        self.pattern = pattern
+        self.workers = workers
+
+    # Stop words of the language, an empty set for lang None
+    @property
+    def stop_words(self):
+        return stop_words(self.lang)
+
+    # Split a Series of lyrics into a Series of word lists; large Series are
+    # split in a process pool if there is more than one CPU to use
+    def split(self, lyrics):
+        workers = self.workers or os.cpu_count() or 1
+        if len(lyrics) < parallel_songs or workers == 1:
+            return split_batch(lyrics, self.pattern)
+
+        batches = [
+            lyrics.iloc[start:start + batch_songs]
+            for start in range(0, len(lyrics), batch_songs)
+        ]
+        with ProcessPoolExecutor(workers) as pool:
+            parts = pool.map(split_batch, batches, [self.pattern] * len(batches))
+
+            return pd.concat(list(parts))
+
+    # List of all words of a Series of lyrics in order, leaving out the stop
+    # words of the language with exclude
+    def words(self, lyrics, exclude=False):
+        words = chain.from_iterable(self.split(lyrics))
+        if exclude:
+            stop = self.stop_words
+            return [word for word in words if word not in stop]
+
+        return list(words)
+
+
+# Split a batch of lyrics with vectorized string operations
+def split_batch(lyrics, pattern=word_pattern):
+    return lyrics.str.lower().str.findall(pattern)
+
+# Stop words of a language from the nltk corpus, loaded once per language
+def stop_words(lang):
+    if lang is None:
+        return frozenset()
+
+    with stop_word_lock:
+        if lang not in stop_word_sets:
+            stop_word_sets[lang] = frozenset(stopwords.words(lang))
+
+        return stop_word_sets[lang]
+
+# Shared tokenizer of a language, e.g. 'english' or 'german'
+def get_tokenizer(lang='english'):
+    if lang not in tokenizers:
+        tokenizers[lang] = Tokenizer(lang)
+
+    return tokenizers[lang]
+
+# Use a custom tokenizer for a language, e.g. one with its own pattern
+def set_tokenizer(lang, tokenizer):
+    tokenizers[lang] = tokenizer
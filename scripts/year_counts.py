@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+
+# Import statements go here
+import numpy as np
+import pandas as pd
+
+
+# Sparse matrix of word counts with one row per year and one column per
+# vocabulary entry of the token store, kept in CSR layout together with the
+# total number of counted words per year
+class YearCounts:
+    def __init__(self, years, vocab, indptr, indices, data):
+        self.years = years
+        self.vocab = vocab
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+        # Year of every stored entry and the totals per year
+        self.entry_rows = np.repeat(np.arange(len(years)), np.diff(indptr))
+        self.totals = np.bincount(
+            self.entry_rows, weights=data, minlength=len(years)
+        ).astype(np.int64)
+        self.lookup = {word: i for i, word in enumerate(vocab)}
+        self.by_word = None
+
+    # Dense word counts of a single year
+    def row(self, year):
+        i = self.years.index(year)
+        counts = np.zeros(len(self.vocab), dtype=np.int64)
+        start, end = self.indptr[i], self.indptr[i + 1]
+        counts[self.indices[start:end]] = self.data[start:end]
+
+        return counts
+
+    # Dense word counts summed over all years
+    def overall(self):
+        return np.bincount(
+            self.indices, weights=self.data, minlength=len(self.vocab)
+        ).astype(np.int64)
+
+    # Inverted index with the years and counts of every word, the same
+    # entries in word order; built on first use
+    def word_index(self):
+        if self.by_word is None:
+            order = np.argsort(self.indices, kind='stable')
+            indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+            np.cumsum(
+                np.bincount(self.indices, minlength=len(self.vocab)), out=indptr[1:]
+            )
+            self.by_word = (indptr, self.entry_rows[order], self.data[order])
+
+        return self.by_word
+
+    # Counts of a single word in every year, read from the inverted index
+    def column(self, word):
+        counts = np.zeros(len(self.years), dtype=np.int64)
+        if word in self.lookup:
+            indptr, rows, data = self.word_index()
+            start, end = indptr[self.lookup[word]], indptr[self.lookup[word] + 1]
+            counts[rows[start:end]] = data[start:end]
+
+        return counts
+
+    # Counts of several words in every year in a single pass over the
+    # entries, with one column per word
+    def columns(self, words):
+        counts = np.zeros((len(self.years), len(words)), dtype=np.int64)
+        ids = np.array([self.lookup.get(word, -1) for word in words], dtype=np.int64)
+
+        # Column of every vocabulary entry, -1 for words not asked for
+        cols = np.full(len(self.vocab), -1, dtype=np.int64)
+        cols[ids[ids >= 0]] = np.flatnonzero(ids >= 0)
+        found = cols[self.indices] >= 0
+        counts[self.entry_rows[found], cols[self.indices[found]]] = self.data[found]
+
+        return counts
+
+    # Most common words and their counts for a year or 'overall'
+    def top_words(self, ref_year, number):
+        counts = self.overall() if ref_year == 'overall' else self.row(ref_year)
+
+        # Stable sort to keep ties in vocabulary order like Counter.most_common
+        top = np.argsort(-counts, kind='stable')[:number]
+        top = top[counts[top] > 0]
+
+        return list(zip(self.vocab[top].tolist(), counts[top].tolist()))
+
+    # Share of a word in percent of all counted words for every year
+    def share(self, word):
+        return np.divide(
+            self.column(word) * 100, self.totals,
+            out=np.zeros(len(self.years)), where=self.totals > 0
+        )
+
+    # Share of several words in percent of all counted words for every year,
+    # with one column per word
+    def column_shares(self, words):
+        totals = self.totals[:, None]
+
+        return np.divide(
+            self.columns(words) * 100, totals,
+            out=np.zeros((len(self.years), len(words))), where=totals > 0
+        )
+
+    # Long format table with the share of every given word in every year
+    def shares(self, words):
+        freq = self.column_shares(words)
+
+        return pd.DataFrame({
+            'Year': np.repeat(self.years, len(words)),
+            'Word': np.tile(list(words), len(self.years)),
+            'Frequency': freq.ravel()
+        })
+
+    # Number of distinct words counted in any year
+    def unique_words(self):
+        return int(np.count_nonzero(self.overall()))
+
+    # New matrix without the given words, e.g. the stop words of a language
+    def exclude(self, words):
+        if not words:
+            return self
+
+        keep = ~np.isin(self.vocab, list(words))[self.indices]
+        indptr = np.zeros(len(self.years) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.entry_rows[keep], minlength=len(self.years)),
+            out=indptr[1:]
+        )
+
+        return YearCounts(
+            self.years, self.vocab, indptr, self.indices[keep], self.data[keep]
+        )
+
+
+# Chunked builder for the year counts in a single sweep over the songs: the
+# (year, word) counts of every chunk are collected and merged into the
+# running totals once they outgrow them, so every pair is only sorted a few
+# times and memory stays within a small multiple of the distinct pairs
+class YearCountsBuilder:
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.pending = []
+        self.pending_size = 0
+
+    # Add the songs of a DataFrame chunk with their tokens
+    def add(self, df, tokens):
+        song_years = df['ReleaseDate'].dt.year.to_numpy().astype(np.int64)
+        rows = tokens.rows(df.index)
+        lengths = tokens.offsets[rows + 1] - tokens.offsets[rows]
+
+        # Year and word ID of every token packed into a single key
+        keys = (np.repeat(song_years, lengths) << 32) | \
+            tokens.select(df.index).astype(np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+
+        self.pending.append((keys, counts))
+        self.pending_size += len(keys)
+        if self.pending_size > len(self.keys):
+            self.merge()
+
+    # Merge the collected chunk counts into the running totals
+    def merge(self):
+        if not self.pending:
+            return
+
+        keys, inverse = np.unique(
+            np.concatenate([self.keys] + [keys for keys, counts in self.pending]),
+            return_inverse=True
+        )
+        weights = np.concatenate([self.counts] + [counts for keys, counts in self.pending])
+        self.counts = np.bincount(
+            inverse, weights=weights, minlength=len(keys)
+        ).astype(np.int64)
+        self.keys = keys
+        self.pending = []
+        self.pending_size = 0
+
+    # Create the sparse matrix over the given vocabulary
+    def result(self, vocab):
+        self.merge()
+        key_years = self.keys >> 32
+        years, rows = np.unique(key_years, return_inverse=True)
+        indptr = np.searchsorted(rows, np.arange(len(years) + 1))
+
+        return YearCounts(
+            [str(year) for year in years], vocab,
+            indptr, self.keys & 0xFFFFFFFF, self.counts
+        )
+
+
+# Count the words of all songs per release year in one pass over the token
+# store, leaving out the words in exclude
+def build_year_counts(df, tokens, exclude=None):
+    builder = YearCountsBuilder()
+    builder.add(df, tokens)
+
+    return builder.result(tokens.vocab).exclude(exclude)
+
+# Store the year counts as arrays; the vocabulary is the one of the token store
+def write_year_counts(year_counts, save_path):
+    np.savez(
+        save_path, years=np.array(year_counts.years, dtype=np.int64),
+        indptr=year_counts.indptr, indices=year_counts.indices,
+        data=year_counts.data
+    )
+
+# Load the year counts stored with write_year_counts
+def read_year_counts(save_path, vocab):
+    with np.load(save_path) as arrays:
+        return YearCounts(
+            [str(year) for year in arrays['years']], vocab,
+            arrays['indptr'], arrays['indices'], arrays['data']
+        )
@@ -0,0 +1,23 @@
+# Imports go here
+import pytest
+
+from scripts import collect_lyrics_data as cld
+from scripts import http_cache, http_session
+from scripts.mock_genius import MockGenius
+
+
+# Mock Genius server with the scraper pointed at it and writing to tmp_path
+@pytest.fixture
+def mock(monkeypatch, tmp_path):
+    mock = MockGenius(artists=3, songs=12)
+    tmp_path.joinpath('logs').mkdir()
+    monkeypatch.setattr(cld, 'genius_api_url', mock.start())
+    monkeypatch.setattr(cld, 'cache', http_cache.ResponseCache(tmp_path.joinpath('cache')))
+    monkeypatch.setattr(cld, 'lyr_path', tmp_path)
+    monkeypatch.setattr(cld, 'log_path', tmp_path.joinpath('logs'))
+    monkeypatch.setattr(cld, 'state_path', tmp_path.joinpath('state.sqlite'))
+    monkeypatch.setattr(cld, 'artist_ids_path', tmp_path.joinpath('artist_ids.json'))
+    monkeypatch.setattr(cld, 't_delay', 0)
+    monkeypatch.setattr(http_session, 'backoff_base', 0.001)
+    yield mock
+    mock.stop()
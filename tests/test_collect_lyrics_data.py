@@ -1,44 +1,106 @@
 # Imports go here
-import configparser
-from pathlib import Path
-import pytest
-import requests
+import json
 
 from scripts import collect_lyrics_data as cld
+from scripts import http_session
+from scripts.song_archive import archive_dir, archive_entries, read_records
 
 
-# Import Client Access Token for Genius API from config file
-config_file = Path('../projekt_atemlos/config/config.ini')
-config = configparser.ConfigParser()
-config.read(config_file)
-genius_access_token = config['DEFAULT']['CLIENT_ACCESS_TOKEN']
+def test_access_token_loaded():
+    assert isinstance(cld.genius_access_token, str)
 
-# Genius API configuration
-genius_api_url = 'https://api.genius.com'
-genius_api_headers = {'Authorization': 'Bearer ' + genius_access_token}
+def test_api_call_ok(mock):
+    url = cld.genius_api_url + '/search'
+    query = {'q': 'Mock Artist 1'}
+    response = http_session.get(url, data=query, headers=cld.genius_api_headers).json()
+    assert response['meta']['status'] == 200
 
+def test_find_artist_id(mock):
+    assert cld.find_artist_id('Mock Artist 1') == 1001
+    assert cld.find_artist_id('Bob Dylan') is None
 
-def test_access_token_loaded():
-    assert isinstance(genius_access_token, str)
+def test_find_artist_id_memo(mock):
+    assert cld.find_artist_id('Mock Artist 2') == 1002
+    assert json.loads(cld.artist_ids_path.read_text()) == {'Mock Artist 2': 1002}
 
-def test_api_call_ok():
-    url = genius_api_url + '/search'
-    query = {'q': 'Sia'}
-    response = requests.get(url, data=query, headers=genius_api_headers).json()
-    assert response['meta']['status'] == 200
+    # Found IDs are not searched again, names not found are not remembered
+    searches = mock.requests['search']
+    assert cld.find_artist_id('Mock Artist 2') == 1002
+    assert mock.requests['search'] == searches
+    cld.find_artist_id('Nobody')
+    assert 'Nobody' not in json.loads(cld.artist_ids_path.read_text())
+
+def test_find_song_ids(mock):
+    song_id_list, next_page = cld.find_song_ids(1001, 5, 1)
+
+    # Songs with another primary artist are left out
+    assert song_id_list == [1001000, 1001001, 1001002, 1001003]
+    assert next_page == 2
+    assert cld.find_song_ids(1001, 5, 3)[1] is None
+
+def test_iter_pages(mock):
+    fetch = lambda page: cld.find_song_ids(1001, 5, page)
+    pages = list(cld.iter_pages(fetch, max_pages=10, ahead=4))
+
+    # Listing stops at the last page; the rest of its window is fetched too
+    assert [page for page, song_id_list in pages] == [1, 2, 3]
+    assert sum(len(song_id_list) for page, song_id_list in pages) == 10
+    assert mock.requests['artist_songs'] == 4
+    assert len(list(cld.iter_pages(fetch, max_pages=2))) == 2
+
+def test_scrape_song_url(mock):
+    lyrics = cld.scrape_song_url(mock.url() + '/lyrics/1001000')
+    assert isinstance(lyrics, str)
+    assert '[Verse 1]' in lyrics
+
+def test_find_song_data(mock):
+    song_data = cld.find_song_data(1001001)
+    assert isinstance(song_data, tuple)
+    assert song_data[1:3] == ('Light home 1', 'Mock Artist 1')
+    assert '[Verse 1]' in song_data[-1]
+
+def test_retries(mock):
+    mock.error_rate = 0.3
+    mock.rate_limit_rate = 0.3
+
+    song_ids = [cld.find_song_ids(1001, 4, page)[0] for page in (1, 2, 3)]
+    assert sum(len(page) for page in song_ids) == 10
+    assert mock.requests['artist_songs'] > 3
+
+def test_main(mock, monkeypatch):
+    monkeypatch.setattr(cld, 'find_artist_list', lambda: mock.artist_names() + ['Nobody'])
+    cld.main()
+
+    # Every fifth song lists another primary artist
+    entries = archive_entries(cld.lyr_path.joinpath(archive_dir))[0]
+    assert len(entries) == 3 * 8
+    shard_path, entry = entries['1001001']
+    key, record = next(read_records(shard_path, [entry]))
+    assert set(record) == set(cld.record_fields)
+
+    # A second run finds all work done
+    requests = sum(mock.requests.values())
+    cld.main()
+    assert sum(mock.requests.values()) == requests
+
+def test_main_telemetry(mock, monkeypatch):
+    monkeypatch.setattr(cld, 'find_artist_list', lambda: ['Nobody'])
+    mock.rate_limit_rate = 0.5
+    cld.main()
 
-def test_find_artist_id():
-    assert isinstance(cld.find_artist_id('Sia'), int)
-    assert cld.find_artist_id('Sia') == 16775
+    # Every request is logged, and nothing scraped is no division by zero
+    with open(next(cld.log_path.glob('requests_*.jsonl'))) as file:
+        entries = [json.loads(line) for line in file]
+    assert [entry['endpoint'] for entry in entries] == ['search']
+    assert entries[0]['status'] == 200
 
-def test_find_song_ids():
-    assert isinstance(cld.find_song_ids(16775, 5), list)
+    log = next(cld.log_path.glob('log_*.txt')).read_text()
+    assert 'Time per song: n/a' in log
+    assert 'Endpoint search: 1 requests' in log
 
-def test_scrape_song_url():
-    assert isinstance(cld.scrape_song_url('https://genius.com/Sia-chandelier-lyrics'), str)
-    assert 'chandelier' in cld.scrape_song_url('https://genius.com/Sia-chandelier-lyrics')
+def test_write_song_files(mock, monkeypatch):
+    monkeypatch.setattr(cld, 'archive_songs', False)
+    song_data = cld.find_song_data(1001001)
 
-def test_find_song_data():
-    assert isinstance(cld.find_song_data(378195), tuple)
-    assert cld.find_song_data(378195)[1] == 'Chandelier'
-    assert 'chandelier' in cld.find_song_data(378195)[-1]
+    with open(cld.write_song(song_data, 1001001)) as file:
+        assert json.loads(file.readline())['SongTitle'] == song_data[1]
@@ -0,0 +1,82 @@
+# Imports go here
+import pandas as pd
+
+from scripts.corpus_analytics import CorpusAnalytics, all_years
+from scripts.token_store import build_tokens
+from scripts.year_counts import build_year_counts
+
+
+df = pd.DataFrame({
+    'ReleaseDate': pd.to_datetime(['1965-08-30', '1975-01-20', '1965-03-22']),
+    'Lyrics': [' the rain and the road ', ' rain rain tangled ', ' road road the end ']
+}, index=pd.Index(['a.txt', 'b.txt', 'c.txt'], name='File'))
+
+
+# Analytics over the test corpus
+def make_analytics(df, cache_size=128):
+    tokens = build_tokens(df['Lyrics'])
+    return CorpusAnalytics(df, tokens, build_year_counts(df, tokens), cache_size)
+
+
+def test_analytics():
+    analytics = make_analytics(df)
+
+    assert analytics.years() == ['1965', '1975']
+    assert analytics.unique_words() == 6
+    assert analytics.words() == ['rain', 'road', 'rain', 'rain', 'tangled', 'road', 'road', 'end']
+    shares, words = analytics.top_freq_years('1975', 2)
+    assert words == ('rain', 'tangled')
+    assert list(analytics.share('rain').round(1)) == [20.0, 66.7]
+
+def test_top_freq_tables():
+    analytics = make_analytics(df)
+    tables = analytics.top_freq_tables(2)
+
+    # Tables for overall and every year with the same layout as shares
+    assert list(tables) == ['overall', '1965', '1975']
+    data, words = tables['1975']
+    expected = analytics.word_counts().shares(words)
+    assert list(data['Year']) == list(expected['Year'])
+    assert list(data['Word']) == list(expected['Word'])
+    assert list(data['Frequency']) == list(expected['Frequency'])
+    assert analytics.top_freq_years('1965', 2) is tables['1965']
+    assert analytics.top_freq_years('1999', 2)[1] == ()
+
+def test_analytics_cache():
+    analytics = make_analytics(df, cache_size=3)
+
+    # Repeated lookups are served from the cache
+    first = analytics.top_freq_years('overall', 2)
+    assert analytics.top_freq_years('overall', 2) is first
+    assert analytics.stats['hits'] == 1
+
+    # Least recently used results are evicted
+    for word in ['rain', 'road', 'end']:
+        analytics.share(word)
+    assert len(analytics.results) == 3
+    assert analytics.top_freq_years('overall', 2) is not first
+
+    # A new corpus version never returns results of the old one
+    other = make_analytics(df.iloc[1:2])
+    analytics.load(other.df, other.tokens, other.year_counts)
+    assert analytics.years() == ['1975']
+    assert analytics.unique_words() == 2
+
+def test_analytics_load_while_computing():
+    analytics = make_analytics(df)
+    other = make_analytics(df.iloc[1:2])
+
+    # A result computed while another corpus is loaded is not stored
+    def compute():
+        analytics.load(other.df, other.tokens, other.year_counts)
+        return 'old'
+
+    assert analytics.cached('test', None, compute) == 'old'
+    assert analytics.cached('test', None, lambda: 'new') == 'new'
+    assert len(analytics.results) == 1
+
+def test_all_years():
+    dates = pd.DataFrame({'ReleaseDate': pd.to_datetime(['2001-05-01', None, '1999-12-31', '2001-01-01'])})
+
+    assert all_years(dates) == ['1999', '2001']
+    assert all_years(dates.iloc[:0]) == []
@@ -0,0 +1,61 @@
+# Imports go here
+import pandas as pd
+
+from scripts import corpus_store as cs
+
+
+# Create a small DataFrame with the columns produced by read_data
+def make_df():
+    df = pd.DataFrame({
+        'FullTitle': ['Desolation Row by Bob Dylan', 'Hurricane by Bob Dylan'],
+        'SongTitle': ['Desolation Row', 'Hurricane'],
+        'Artist': ['Bob Dylan', 'Bob Dylan'],
+        'ReleaseDate': pd.to_datetime(['1965-08-30', '1975-11-01']),
+        'Pageviews': [1200, 0],
+        'LyricsState': pd.Categorical(['complete', 'complete']),
+        'Lyrics': [' They\'re selling postcards of the hanging ', ' Pistol shots ring out ü '],
+        'WordsUsed': [7, 4]
+    }, index=pd.Index(['a.txt', 'b.txt'], name='File'))
+
+    return df
+
+
+def test_store_roundtrip(tmp_path):
+    df = make_df()
+    cs.write_store(df, tmp_path.joinpath('corpus'))
+    # Writing again replaces the existing store
+    cs.write_store(df, tmp_path.joinpath('corpus'))
+
+    meta = cs.read_store(tmp_path.joinpath('corpus'))
+    assert 'Lyrics' not in meta.columns
+    pd.testing.assert_frame_equal(meta, df.drop(columns='Lyrics'))
+
+    lyrics = cs.read_text(tmp_path.joinpath('corpus'), 'Lyrics')
+    assert len(lyrics) == 2
+    assert lyrics[1] == df['Lyrics'][1]
+    pd.testing.assert_series_equal(
+        lyrics.to_series(meta.index, 'Lyrics'), df['Lyrics']
+    )
+
+def test_store_empty(tmp_path):
+    df = make_df().iloc[:0]
+    cs.write_store(df, tmp_path.joinpath('corpus'))
+
+    assert len(cs.read_store(tmp_path.joinpath('corpus'))) == 0
+    assert len(cs.read_text(tmp_path.joinpath('corpus'), 'Lyrics')) == 0
+
+def test_store_widens_types(tmp_path):
+    df = make_df()
+    later = make_df().rename(index={'a.txt': 'c.txt', 'b.txt': 'd.txt'})
+    later['Pageviews'] = [2.5, 3.0]
+
+    # A later chunk of floats widens a column started with ints
+    writer = cs.StoreWriter(tmp_path.joinpath('corpus'))
+    writer.append(df)
+    writer.append(later)
+    writer.close()
+
+    meta = cs.read_store(tmp_path.joinpath('corpus'))
+    assert meta['Pageviews'].dtype == 'float64'
+    assert list(meta['Pageviews']) == [1200, 0, 2.5, 3.0]
+    assert meta['WordsUsed'].dtype == 'int64'
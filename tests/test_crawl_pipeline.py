@@ -0,0 +1,76 @@
+# Imports go here
+import asyncio
+import pytest
+
+from scripts import collect_lyrics_data as cld, crawl_pipeline
+from scripts.async_crawl import AsyncCrawler
+from scripts.crawl_pipeline import CrawlPipeline
+from scripts.crawl_state import CrawlState
+from scripts.song_archive import archive_dir, archive_entries
+
+
+# Crawl with the staged pipeline
+def run_pipeline(state, artist_list):
+    workers = {'search': 1, 'list': 1, 'metadata': 2, 'scrape': 2, 'persist': 1}
+    return CrawlPipeline(state, workers, rate=1000, maxsize=2).crawl(artist_list)
+
+# Crawl with the async crawler
+def run_async(state, artist_list):
+    return asyncio.run(AsyncCrawler(state, concurrency=4, rate=1000).crawl(artist_list))
+
+
+@pytest.mark.parametrize('run', [run_pipeline, run_async])
+def test_crawl(mock, run):
+    state = CrawlState(cld.state_path)
+    artist_list = mock.artist_names() + ['Nobody']
+
+    assert run(state, artist_list) == (3, 24, ['Nobody'])
+    assert len(archive_entries(cld.lyr_path.joinpath(archive_dir))[0]) == 24
+
+def test_pipeline_resume(mock):
+    state = CrawlState(cld.state_path)
+    artist_list = mock.artist_names()
+
+    # Failed songs leave their artists open for the next run
+    mock.error_rate = 1.0
+    with pytest.raises(Exception):
+        run_pipeline(state, artist_list)
+    assert state.summary(artist_list) == (0, 0, [])
+
+    mock.error_rate = 0.0
+    assert run_pipeline(state, artist_list) == (3, 24, [])
+
+def test_pipeline_resume_skips_done(mock, monkeypatch):
+    state = CrawlState(cld.state_path)
+    artist_list = mock.artist_names()
+    assert run_pipeline(state, artist_list) == (3, 24, [])
+    requests = sum(mock.requests.values())
+
+    # A second run finds all work done and sends no requests
+    written = []
+    monkeypatch.setattr(crawl_pipeline, 'write_song', lambda *args: written.append(args))
+    assert run_pipeline(state, artist_list) == (3, 24, [])
+    assert written == []
+    assert sum(mock.requests.values()) == requests
+
+def test_pipeline_stage_error(mock, monkeypatch):
+    state = CrawlState(cld.state_path)
+    artist_list = mock.artist_names()
+    failed = []
+
+    # A failing song does not stop the other songs, and its error is raised
+    # once the pipeline is drained
+    def write_song(song_data, song_id):
+        if not failed:
+            failed.append(song_id)
+            raise OSError('disk full')
+        return cld.write_song(song_data, song_id)
+
+    monkeypatch.setattr(crawl_pipeline, 'write_song', write_song)
+    with pytest.raises(OSError, match='disk full'):
+        run_pipeline(state, artist_list)
+
+    # The artist of the failed song stays open for the next run
+    assert not state.song_done(failed[0])
+    assert state.summary(artist_list) == (2, 16, [])
+    assert len(archive_entries(cld.lyr_path.joinpath(archive_dir))[0]) == 23
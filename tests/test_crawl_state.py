@@ -0,0 +1,34 @@
+# Imports go here
+from scripts.crawl_state import CrawlState
+
+
+def test_resume(tmp_path):
+    state_path = tmp_path.joinpath('state.sqlite')
+    state = CrawlState(state_path)
+    state.set_artist('Bob Dylan', 111)
+    state.set_artist('Nobody', None)
+    state.add_page(111, 1, [7, 5, 9], 2)
+    state.set_song(5, 'Bob Dylan_Song.jsonl')
+    state.close()
+
+    # A new run sees everything done before the interruption
+    state = CrawlState(state_path)
+    assert state.artist('Bob Dylan') == (111, 0)
+    assert state.artist('Nobody') == (None, 1)
+    assert state.artist('Sia') is None
+    assert state.page(111, 1) == ([7, 5, 9], 2)
+    assert state.page(111, 2) is None
+    assert [state.song_done(song_id) for song_id in (7, 5, 9)] == [False, True, False]
+
+def test_summary(tmp_path):
+    state = CrawlState(tmp_path.joinpath('state.sqlite'))
+    state.set_artist('Bob Dylan', 111)
+    state.set_artist('Nobody', None)
+    state.add_page(111, 1, [7, 5], None)
+    state.set_song(7, 'a.jsonl')
+    state.set_song(5, 'b.jsonl')
+
+    # Artists are counted once they are done
+    assert state.summary(['Bob Dylan', 'Nobody']) == (0, 0, ['Nobody'])
+    state.finish_artist('Bob Dylan')
+    assert state.summary(['Bob Dylan', 'Nobody', 'Sia']) == (1, 2, ['Nobody'])
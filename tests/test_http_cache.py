@@ -0,0 +1,73 @@
+# Imports go here
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import threading
+
+from scripts import http_cache
+
+
+# Handler serving a page with an ETag and answering revalidations with 304
+class Handler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    hits = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = 'lyrics {}'.format(self.etag).encode()
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.etag = '"v1"'
+    Handler.hits = []
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+
+
+def test_fresh_hit(server, tmp_path):
+    cache = http_cache.ResponseCache(tmp_path)
+    first = cache.get(server + '/songs/1', params={'page': 1})
+    second = cache.get(server + '/songs/1', params={'page': 1})
+    cache.get(server + '/songs/1', params={'page': 2})
+
+    assert first.text == second.text == 'lyrics "v1"'
+    assert len(Handler.hits) == 2
+    assert cache.stats == {'hit': 1, 'miss': 2}
+
+def test_revalidation(server, tmp_path):
+    cache = http_cache.ResponseCache(tmp_path, [(r'/songs/', 0)])
+    cache.get(server + '/songs/1')
+    assert cache.get(server + '/songs/1').text == 'lyrics "v1"'
+    assert cache.stats['revalidated'] == 1
+
+    Handler.etag = '"v2"'
+    assert cache.get(server + '/songs/1').text == 'lyrics "v2"'
+    assert len(Handler.hits) == 3
+
+def test_cache_only(server, tmp_path):
+    http_cache.ResponseCache(tmp_path).get(server + '/songs/1')
+    cache = http_cache.ResponseCache(tmp_path, [(r'/songs/', 0)], cache_only=True)
+
+    assert cache.get(server + '/songs/1').text == 'lyrics "v1"'
+    with pytest.raises(http_cache.CacheMiss):
+        cache.get(server + '/songs/2')
+    assert len(Handler.hits) == 1
@@ -0,0 +1,75 @@
+# Imports go here
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import threading
+
+from scripts import http_session
+
+
+# Handler answering with the status codes queued for a path
+class Handler(BaseHTTPRequestHandler):
+    statuses = {}
+    hits = {}
+
+    def do_GET(self):
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        queue = self.statuses.get(self.path, [])
+        status = queue.pop(0) if queue else 200
+
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_session, 'backoff_base', 0.001)
+    Handler.statuses = {}
+    Handler.hits = {}
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    server.shutdown()
+
+
+def test_retry_after():
+    response = requests.Response()
+    response.headers['Retry-After'] = '3'
+    assert http_session.retry_after(response) == 3
+    response.headers['Retry-After'] = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    assert http_session.retry_after(response) == 0
+
+def test_rate_limit_delay(monkeypatch):
+    monkeypatch.setattr(http_session, 'retry_after_max', 10)
+    response = requests.Response()
+    response.headers['Retry-After'] = '3'
+    assert http_session.rate_limit_delay(response, 0) == 3
+
+    # Missing or too long delays fall back to the backoff
+    response.headers['Retry-After'] = '3600'
+    assert http_session.rate_limit_delay(response, 0) <= http_session.backoff_base
+    del response.headers['Retry-After']
+    assert http_session.rate_limit_delay(response, 2) <= http_session.backoff_base * 4
+
+def test_get_retries(server):
+    Handler.statuses['/flaky'] = [503, 429, 502]
+    response = http_session.get(server + '/flaky')
+
+    assert response.text == 'ok'
+    assert Handler.hits['/flaky'] == 4
+
+def test_get_gives_up(server):
+    Handler.statuses['/down'] = [503] * http_session.max_attempts
+
+    with pytest.raises(requests.HTTPError):
+        http_session.get(server + '/down')
+    assert Handler.hits['/down'] == http_session.max_attempts
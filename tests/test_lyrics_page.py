@@ -0,0 +1,32 @@
+# Imports go here
+import pytest
+
+from scripts import lyrics_page as lp
+
+
+pages = [
+    # Nested divs, annotations and entities inside the container
+    '<html><body><div class="header"><div>Menu</div></div>'
+    '<div class="lyrics"><p>[Verse 1]<br/>\n<a href="/1">Love &amp; theft</a>'
+    '<div class="ad"><div></div></div>&foo; &#39;again&#39;</p></div>'
+    '<div class="footer">Footer</div></body></html>',
+    # Markup that looks like the container inside scripts and comments
+    '<script>var s = "<div class=\'lyrics\'>fake</div>";</script>'
+    '<!-- <div class="lyrics">old</div> --><div class=lyrics>'
+    '<!--sse-->Real <div/>text<!--/sse--></div>',
+    # Container with several classes and without end tag
+    '<div class="song lyrics  big"><p>Don\'t think twice</p><div>it\'s all right',
+]
+
+
+@pytest.mark.parametrize('page', pages)
+def test_extract_lyrics(page):
+    assert lp.extract_lyrics(page) == lp.extract_lyrics_full(page)
+
+def test_lyrics_fragment():
+    assert lp.lyrics_fragment(pages[1]).startswith('<div class=lyrics>')
+    assert lp.lyrics_fragment('<div class="lyrics-header">Title</div>') is None
+
+def test_extract_lyrics_missing():
+    with pytest.raises(AttributeError):
+        lp.extract_lyrics('<div class="header">No lyrics</div>')
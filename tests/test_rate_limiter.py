@@ -0,0 +1,62 @@
+# Imports go here
+import asyncio
+import time
+
+from scripts import telemetry
+from scripts.rate_limiter import RateLimiter
+
+
+def test_rate_limiter(monkeypatch):
+    monkeypatch.setattr(telemetry, 'wait', lambda seconds: None)
+    limiter = RateLimiter(100)
+    t_start = time.monotonic()
+    for _ in range(11):
+        limiter.acquire()
+    assert time.monotonic() - t_start >= 0.1
+
+def test_rate_limiter_wait(monkeypatch):
+    waits = []
+    monkeypatch.setattr(telemetry, 'wait', waits.append)
+    limiter = RateLimiter(10)
+    limiter.acquire()
+    limiter.acquire()
+    assert waits[0] < 0.01 and waits[1] > 0.05
+
+def test_rate_limiter_burst():
+    limiter = RateLimiter(10, capacity=3)
+
+    # Up to capacity requests are sent at once, the next ones are spaced
+    delays = [limiter.reserve() for _ in range(5)]
+    assert max(delays[:3]) < 0.01
+    assert 0.05 < delays[3] < 0.11
+    assert 0.15 < delays[4] < 0.21
+    assert limiter.reserve(0) == 0
+
+def test_rate_limiter_async_pacing():
+    limiter = RateLimiter(50)
+
+    # N requests at rate r take (N - 1) / r seconds
+    async def acquire_all():
+        t_start = time.monotonic()
+        for _ in range(11):
+            await limiter.acquire_async()
+        return time.monotonic() - t_start
+
+    assert 0.2 <= asyncio.run(acquire_all()) < 0.3
+
+def test_rate_limiter_async_order():
+    limiter = RateLimiter(50)
+    served = []
+
+    # Concurrent waiters are served one slot apart in order of arrival
+    async def waiter(i):
+        await limiter.acquire_async()
+        served.append((i, time.monotonic()))
+
+    async def run():
+        await asyncio.gather(*(waiter(i) for i in range(6)))
+
+    asyncio.run(run())
+    assert [i for i, t in served] == list(range(6))
+    gaps = [b - a for (_, a), (_, b) in zip(served, served[1:])]
+    assert min(gaps) > 0.015
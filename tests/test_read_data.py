@@ -0,0 +1,232 @@
+# Imports go here
+import json
+import pandas as pd
+import pytest
+
+from scripts import read_data as rd
+from scripts.song_archive import SongArchive, archive_dir
+
+
+# Write a lyrics file in the format expected by read_data
+def write_song(lyr_path, title, date='2001-09-11', pageviews='100',
+               lyrics='[Verse 1]\nLove and theft;\nlove again\n'):
+    fields = [title + ' by Bob Dylan', title, 'Bob Dylan', date, pageviews,
+              'complete', lyrics]
+    song = lyr_path.joinpath('Bob Dylan_{}.txt'.format(title.replace('/', ' ')))
+    song.write_text(';\n## '.join(fields) + '\n')
+
+    return song
+
+# Write a lyrics file with a JSON record as written by the scraper
+def write_record(lyr_path, title, date='2001-09-11', pageviews=100,
+                 lyrics='[Verse 1]\nLove and theft;\nlove again\n'):
+    values = [title + ' by Bob Dylan', title, 'Bob Dylan', date, pageviews,
+              'complete', lyrics]
+    song = lyr_path.joinpath('Bob Dylan_{}.jsonl'.format(title.replace('/', ' ')))
+    song.write_text(json.dumps(dict(zip(rd.columns, values))) + '\n')
+
+    return song
+
+
+@pytest.fixture
+def lyr_path(tmp_path):
+    lyr_path = tmp_path.joinpath('lyrics')
+    lyr_path.mkdir()
+    write_song(lyr_path, 'Mississippi')
+    write_song(lyr_path, 'Tangled Up in Blue (Live 5/17/66)')
+    write_song(lyr_path, 'Unreleased', date='None')
+    write_song(lyr_path, 'Obscure', pageviews='missing')
+
+    return lyr_path
+
+
+def test_parse_song(lyr_path):
+    record = rd.parse_song(lyr_path.joinpath('Bob Dylan_Mississippi.txt'))
+    assert len(record) == len(rd.columns)
+    assert record[:3] == ['Mississippi by Bob Dylan', 'Mississippi', 'Bob Dylan']
+    assert 'Verse' not in record[6]
+    assert 'theft, love' in record[6]
+
+def test_parse_record(lyr_path):
+    record = rd.parse_song(write_record(lyr_path, 'Sugar Baby', date=None))
+    assert record[:4] == ['Sugar Baby by Bob Dylan', 'Sugar Baby', 'Bob Dylan', 'None']
+    assert record[4] == '100'
+    assert record[6] == ' Love and theft; love again '
+
+def test_find_songs(lyr_path):
+    write_record(lyr_path, 'Mississippi')
+    songs = [song.name for song in rd.find_songs(lyr_path)]
+
+    assert 'Bob Dylan_Mississippi.jsonl' in songs
+    assert 'Bob Dylan_Mississippi.txt' not in songs
+    assert len(songs) == 4
+
+def test_read_data(lyr_path, tmp_path):
+    save_path = tmp_path.joinpath('df.pkl')
+    rd.read_data(lyr_path, save_path, workers=2)
+    df = pd.read_pickle(save_path).set_index('SongTitle')
+
+    assert list(df.columns) == [
+        'FullTitle', 'Artist', 'ReleaseDate', 'Pageviews', 'LyricsState',
+        'Lyrics', 'WordsUsed'
+    ]
+    assert 'Unreleased' not in df.index
+    assert df.loc['Obscure', 'Pageviews'] == 0
+    assert df.loc['Mississippi', 'WordsUsed'] == 4
+    assert df.loc['Tangled Up in Blue (Live 5/17/66)', 'ReleaseDate'] == \
+        pd.Timestamp('1966-05-17')
+
+@pytest.mark.parametrize('save_name', ['df.pkl', 'corpus'])
+def test_read_data_empty(tmp_path, save_name):
+    lyr_path = tmp_path.joinpath('lyrics')
+    lyr_path.mkdir()
+    save_path = tmp_path.joinpath(save_name)
+    rd.read_data(lyr_path, save_path, workers=2)
+
+    df = rd.load_data(save_path)
+    assert len(df) == 0
+    assert df.index.name == 'File'
+    assert set(df.columns) == set(rd.columns + ['WordsUsed'])
+    assert len(rd.load_tokens(save_path)) == 0
+
+@pytest.mark.parametrize('save_name', ['df.pkl', 'corpus'])
+def test_update_data(lyr_path, tmp_path, save_name):
+    save_path = tmp_path.joinpath(save_name)
+    manifest_path = tmp_path.joinpath('manifest.json')
+
+    # The first update builds the corpus and the manifest
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+    assert len(rd.load_data(save_path)) == 3
+    assert len(rd.read_manifest(manifest_path)) == 4
+
+    # Add, change and delete one file each
+    write_song(lyr_path, 'Highlands')
+    write_song(lyr_path, 'Mississippi', pageviews='200')
+    lyr_path.joinpath('Bob Dylan_Obscure.txt').unlink()
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+
+    df = rd.load_data(save_path).set_index('SongTitle')
+    assert sorted(df.index) == [
+        'Highlands', 'Mississippi', 'Tangled Up in Blue (Live 5/17/66)'
+    ]
+    assert df.loc['Mississippi', 'Pageviews'] == 200
+
+    # The token store follows the stored data
+    tokens = rd.load_tokens(save_path)
+    assert sorted(tokens.index) == sorted(rd.load_data(save_path).index)
+    assert tokens.counter()['love'] == 6
+    assert 'Bob Dylan_Obscure.txt' not in rd.read_manifest(manifest_path)
+
+@pytest.mark.parametrize('save_name', ['df.pkl', 'corpus'])
+def test_update_data_all_removed(lyr_path, tmp_path, save_name):
+    save_path = tmp_path.joinpath(save_name)
+    manifest_path = tmp_path.joinpath('manifest.json')
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+
+    # Removing every file leaves an empty corpus with all columns
+    for song in rd.find_songs(lyr_path):
+        song.unlink()
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+
+    df = rd.load_data(save_path)
+    assert len(df) == 0
+    assert set(df.columns) == set(rd.columns + ['WordsUsed'])
+    assert len(rd.load_tokens(save_path)) == 0
+    assert rd.load_year_counts(save_path, rd.load_tokens(save_path)).years == []
+    assert rd.read_manifest(manifest_path) == {}
+
+def test_iter_songs(lyr_path):
+    records = dict(rd.iter_songs(lyr_path, workers=2))
+
+    assert len(records) == 4
+    assert records['Bob Dylan_Unreleased.txt'][3] == 'None'
+
+def test_write_corpus_chunks(lyr_path, tmp_path):
+    save_path = tmp_path.joinpath('corpus')
+    rd.write_corpus(rd.iter_songs(lyr_path, workers=2), save_path, rows=1, sketch=True)
+
+    df = rd.load_data(save_path)
+    tokens = rd.load_tokens(save_path)
+    year_counts = rd.load_year_counts(save_path, tokens)
+
+    assert len(df) == 3
+    assert list(tokens.words_used(df.index)) == list(df['WordsUsed'])
+    assert year_counts.years == ['1966', '2001']
+    assert list(year_counts.column('love')) == [2, 4]
+
+    # The sketches written at ingest match the exact counts, with ties in
+    # word order
+    sketches = rd.load_year_sketches(save_path)
+    assert sketches.years == year_counts.years
+    assert list(sketches.totals) == list(year_counts.totals)
+    assert sketches.top_words('overall', 3) == [('love', 6), ('again', 3), ('and', 3)]
+
+def test_archive(lyr_path, tmp_path):
+    save_path = tmp_path.joinpath('corpus')
+    manifest_path = tmp_path.joinpath('manifest.json')
+    archive = SongArchive(lyr_path.joinpath(archive_dir))
+    archive.append('101', {
+        'FullTitle': 'Highlands by Bob Dylan', 'SongTitle': 'Highlands',
+        'Artist': 'Bob Dylan', 'ReleaseDate': '1997-09-30', 'Pageviews': 50,
+        'LyricsState': 'complete', 'Lyrics': '[Verse 1]\nLove;\nlove'
+    })
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+
+    df = rd.load_data(save_path)
+    assert df.loc['101', 'SongTitle'] == 'Highlands'
+    assert df.loc['101', 'Lyrics'] == ' Love; love'
+    assert len(df) == 4
+
+    # Songs appended later replace earlier records of the same key
+    archive.append('101', {
+        'FullTitle': 'Highlands by Bob Dylan', 'SongTitle': 'Highlands',
+        'Artist': 'Bob Dylan', 'ReleaseDate': '1997-09-30', 'Pageviews': 70,
+        'LyricsState': 'complete', 'Lyrics': 'theft'
+    })
+    archive.close()
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+
+    df = rd.load_data(save_path)
+    assert df.loc['101', 'Pageviews'] == 70
+    assert len(df) == 4
+    assert rd.load_tokens(save_path).counter(['101']) == {'theft': 1}
+    assert rd.read_manifest(manifest_path)['archive/shard_00000.jsonl'] == {'entries': 2}
+
+def test_update_data_sketch(lyr_path, tmp_path):
+    save_path = tmp_path.joinpath('corpus')
+    manifest_path = tmp_path.joinpath('manifest.json')
+
+    # Sketches are only built in sketch mode, and switching it on rebuilds
+    # the corpus with them
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+    assert not rd.sketch_path(save_path).exists()
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2, sketch=True)
+    assert rd.load_year_sketches(save_path).years == ['1966', '2001']
+
+    # Updates without sketch mode remove the outdated sketches
+    write_song(lyr_path, 'Highlands', date='1997-09-30')
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+    assert not rd.sketch_path(save_path).exists()
+
+@pytest.mark.parametrize('save_name', ['df.pkl', 'corpus'])
+def test_update_data_streams(lyr_path, tmp_path, save_name):
+    save_path = tmp_path.joinpath(save_name)
+    manifest_path = tmp_path.joinpath('manifest.json')
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+
+    # Only deleting songs copies the kept ones with their lyrics and tokens
+    lyr_path.joinpath('Bob Dylan_Obscure.txt').unlink()
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+    df = rd.load_data(save_path)
+    assert sorted(df['SongTitle']) == ['Mississippi', 'Tangled Up in Blue (Live 5/17/66)']
+    assert df.loc['Bob Dylan_Mississippi.txt', 'Lyrics'] == ' Love and theft, love again '
+
+    # The word counts per year match the ones of a corpus built from scratch
+    write_song(lyr_path, 'Highlands', date='1997-09-30', lyrics='theft and road')
+    rd.update_data(lyr_path, save_path, manifest_path, workers=2)
+    tokens = rd.load_tokens(save_path)
+    year_counts = rd.load_year_counts(save_path, tokens)
+    assert year_counts.years == ['1966', '1997', '2001']
+    assert list(year_counts.column('theft')) == [1, 1, 1]
+    assert list(year_counts.column('road')) == [0, 1, 0]
+    assert list(tokens.words_used(df.index)) == list(df['WordsUsed'])
@@ -0,0 +1,63 @@
+# Imports go here
+import numpy as np
+import pandas as pd
+
+from bokeh.document import Document
+from bokeh.plotting import figure
+
+from scripts.scatter_bins import BinnedScatter, bin_points
+
+
+rng = np.random.default_rng(0)
+df = pd.DataFrame({
+    'x': rng.uniform(0, 100, 1000),
+    'y': rng.uniform(0, 10, 1000),
+    'WordsUsed': rng.integers(50, 300, 1000),
+    'SongTitle': ['Song {}'.format(i) for i in range(1000)],
+    'Lyrics': ['la ' * 100] * 1000
+})
+
+
+def test_bin_points():
+    bins = bin_points([0.5, 1.5, 1.6, 9.9], [0, 0, 0, 1], [1, 2, 4, 8], (0, 10), (0, 1), (10, 1))
+
+    assert list(bins['x']) == [0.5, 1.5, 9.5]
+    assert list(bins['count']) == [1, 2, 1]
+    assert list(bins['Value']) == [1, 3, 8]
+    assert list(bins['width']) == [1, 1, 1]
+
+def test_binned_scatter():
+    songs = BinnedScatter(df, 'x', 'y', ['SongTitle'], 'WordsUsed', threshold=100, bins=(10, 5))
+
+    # All songs in view are binned, and the lyrics are never sent
+    assert len(songs.point_source.data['x']) == 0
+    assert songs.bin_source.data['count'].sum() == 1000
+    assert len(songs.bin_source.data['x']) <= 50
+    assert 'Lyrics' not in songs.point_source.data
+
+    # Zooming in shows the single songs in view
+    songs.update((0, 10), (0, 10))
+    visible = (df['x'] <= 10).sum()
+    assert len(songs.point_source.data['x']) == visible
+    assert set(songs.point_source.data) == {'x', 'y', 'WordsUsed', 'SongTitle'}
+    assert len(songs.bin_source.data['x']) == 0
+
+def test_link():
+    songs = BinnedScatter(df, 'x', 'y', ['SongTitle'], 'WordsUsed', threshold=100, bins=(10, 5))
+    plot = figure()
+    songs.link(plot)
+
+    # Reset returns to fixed ranges over all songs
+    assert plot.x_range.reset_start <= df['x'].min()
+    assert plot.x_range.reset_end >= df['x'].max()
+
+    # Without a document every range change updates the view at once
+    plot.x_range.end = 10
+    assert len(songs.point_source.data['x']) == (df['x'] <= 10).sum()
+
+    # In a document the changes of one zoom are handled by a single update
+    Document().add_root(plot)
+    plot.x_range.start = 1
+    plot.x_range.end = 5
+    plot.y_range.end = 5
+    assert len(plot.document.session_callbacks) == 1
@@ -0,0 +1,59 @@
+# Imports go here
+import numpy as np
+import pandas as pd
+
+from scripts import sketches as sk
+from scripts.token_store import build_tokens
+from scripts.year_counts import build_year_counts
+
+
+df = pd.DataFrame({
+    'ReleaseDate': pd.to_datetime(['1965-08-30', '1975-01-20', '1965-03-22']),
+    'Lyrics': [' the rain and the road ', ' rain rain tangled ', ' road road the end ']
+}, index=pd.Index(['a.txt', 'b.txt', 'c.txt'], name='File'))
+
+
+def test_hyperloglog():
+    hll = sk.HyperLogLog(0.01)
+    hll.add(np.arange(50000, dtype=np.uint64))
+    hll.add(np.arange(50000, dtype=np.uint64))
+
+    assert abs(hll.count() - 50000) < 50000 * 0.03
+
+def test_count_min():
+    cms = sk.CountMinSketch(error=0.01)
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 1000, 10000).astype(np.uint64)
+    cms.add(values, np.ones(len(values), dtype=np.int64))
+
+    # Estimates are never too low and at most error times the total too high
+    true = np.bincount(values.astype(np.int64), minlength=1000)
+    estimates = cms.estimate(np.arange(1000, dtype=np.uint64))
+    assert (estimates >= true).all()
+    assert ((estimates - true) <= 0.01 * len(values)).mean() > 0.99
+
+def test_year_sketches():
+    tokens = build_tokens(df['Lyrics'])
+    exact = build_year_counts(df, tokens, {'the', 'and'})
+    sketches = sk.build_year_sketches(df, tokens, rows=1).exclude({'the', 'and'})
+
+    # Small corpora are counted without collisions
+    assert sketches.years == exact.years
+    assert list(sketches.totals) == list(exact.totals)
+    assert sketches.top_words('overall', 2) == exact.top_words('overall', 2)
+    assert sketches.top_words('1975', 5) == exact.top_words('1975', 5)
+    assert sketches.shares(['road', 'rain']).equals(exact.shares(['road', 'rain']))
+    assert sketches.unique_words() == 6
+
+def test_year_sketches_io(tmp_path):
+    tokens = build_tokens(df['Lyrics'])
+    sketches = sk.build_year_sketches(df, tokens, rows=2)
+    sk.write_year_sketches(sketches, tmp_path.joinpath('sketch.npz'))
+    loaded = sk.read_year_sketches(tmp_path.joinpath('sketch.npz'))
+
+    # The stored sketches answer like the built ones without a vocabulary
+    assert loaded.years == sketches.years
+    assert list(loaded.totals) == list(sketches.totals)
+    assert loaded.top_words('1965', 3) == sketches.top_words('1965', 3)
+    assert loaded.unique_words() == sketches.unique_words()
+    assert loaded.exclude({'the'}).shares(['road']).equals(sketches.exclude({'the'}).shares(['road']))
@@ -0,0 +1,43 @@
+# Imports go here
+from scripts import song_archive as sa
+
+
+def test_append_and_read(tmp_path):
+    archive = sa.SongArchive(tmp_path, shard_bytes=200)
+    for i in range(6):
+        archive.append(str(i), {'SongTitle': 'Song {}'.format(i), 'Lyrics': 'x' * 50})
+    archive.append('2', {'SongTitle': 'Song 2 (Remaster)', 'Lyrics': ''})
+    archive.close()
+
+    # Records are spread over several shards, the last append of a key wins
+    entries, counts = sa.archive_entries(tmp_path)
+    assert len(sa.shard_paths(tmp_path)) > 1
+    assert sum(counts.values()) == 7
+    assert sorted(entries) == ['0', '1', '2', '3', '4', '5']
+
+    shard_path, entry = entries['2']
+    assert list(sa.read_records(shard_path, [entry])) == [
+        ('2', {'SongTitle': 'Song 2 (Remaster)', 'Lyrics': ''})
+    ]
+
+def test_resume_after_torn_write(tmp_path):
+    archive = sa.SongArchive(tmp_path)
+    archive.append('1', {'SongTitle': 'One'})
+    archive.close()
+
+    # An interrupted write leaves a record without its complete index line
+    shard_path = sa.shard_paths(tmp_path)[0]
+    with open(shard_path, 'ab') as file:
+        file.write(b'{"SongTitle": "Two", "Key": "2"}\n')
+    with open(shard_path.with_suffix(sa.index_suffix), 'a') as file:
+        file.write('2\t3')
+    assert sa.read_index(shard_path) == ([('1', 0, 33)], 1)
+
+    archive = sa.SongArchive(tmp_path)
+    archive.append('3', {'SongTitle': 'Three'})
+    archive.close()
+
+    entries, counts = sa.archive_entries(tmp_path, {shard_path.name: 1})
+    assert list(entries) == ['3']
+    shard_path, entry = entries['3']
+    assert list(sa.read_records(shard_path, [entry])) == [('3', {'SongTitle': 'Three'})]
@@ -0,0 +1,43 @@
+# Imports go here
+import json
+
+from scripts import telemetry
+
+
+def test_record(tmp_path):
+    recorder = telemetry.Telemetry(tmp_path.joinpath('requests.jsonl'), [(r'/songs/', 'songs')])
+    recorder.record('http://x/songs/1', status=200, latency=0.012, size=100)
+    recorder.record('http://x/songs/2', status=503, latency=0.3, retries=4, backoff=2.5)
+    recorder.record('http://x/songs/1', status=200, size=100, source='cache')
+    recorder.record('http://x/other', status=200, latency=0.001)
+    summary = recorder.close()
+
+    with open(tmp_path.joinpath('requests.jsonl')) as file:
+        entries = [json.loads(line) for line in file]
+    assert [entry['endpoint'] for entry in entries] == ['songs', 'songs', 'songs', 'x']
+    assert entries[1]['retries'] == 4
+
+    assert 'Endpoint songs: 2 requests, 1 from cache, 1 errors, 4 retries, 2.5 s backoff' in summary
+    assert 'Endpoint x: 1 requests' in summary
+
+def test_histogram():
+    lines = telemetry.histogram([3, 4, 15, 700])
+
+    assert lines[0].split()[0] == '2-5'
+    assert lines[0].endswith(' 2')
+    assert len(lines) == 8
+    assert lines[-1].split()[0] == '500-1000'
+
+def test_client_wait(tmp_path):
+    telemetry.start(tmp_path.joinpath('requests.jsonl'))
+    telemetry.wait(0.5)
+    telemetry.wait(0.25)
+    telemetry.record('http://x/a', status=200)
+    telemetry.record('http://x/b', status=200)
+    summary = telemetry.stop()
+
+    # The waits go to the next request of the thread only
+    with open(tmp_path.joinpath('requests.jsonl')) as file:
+        entries = [json.loads(line) for line in file]
+    assert [entry['client_wait'] for entry in entries] == [0.75, 0.0]
+    assert '0.8 s client wait' in summary
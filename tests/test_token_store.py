@@ -0,0 +1,35 @@
+# Imports go here
+import pandas as pd
+
+from scripts import token_store as ts
+
+
+lyrics = pd.Series(
+    [' Love and theft, love again ', ' Don\'t think twice ', ' The times they are a-changin\' '],
+    index=pd.Index(['a.txt', 'b.txt', 'c.txt'], name='File')
+)
+
+
+def test_build_tokens():
+    tokens = ts.build_tokens(lyrics)
+    assert tokens.ids.dtype == 'int32'
+    assert list(tokens.offsets) == [0, 5, 8, 14]
+    assert tokens.words(['b.txt']) == ['don\'t', 'think', 'twice']
+    assert list(tokens.words_used()) == [4, 3, 6]
+    assert tokens.counter(['a.txt'], exclude={'and'}) == {'love': 2, 'theft': 1, 'again': 1}
+
+def test_tokens_roundtrip(tmp_path):
+    tokens = ts.build_tokens(lyrics)
+    ts.write_tokens(tokens, tmp_path.joinpath('tokens'))
+    loaded = ts.read_tokens(tmp_path.joinpath('tokens'))
+
+    assert list(loaded.index) == list(lyrics.index)
+    assert loaded.words() == tokens.words()
+
+def test_tokens_drop_extend():
+    tokens = ts.build_tokens(lyrics).drop(['a.txt'])
+    tokens = tokens.extend(pd.Series([' Love minus zero '], index=['d.txt']))
+
+    assert list(tokens.index) == ['b.txt', 'c.txt', 'd.txt']
+    assert tokens.words(['d.txt', 'b.txt']) == ['love', 'minus', 'zero', 'don\'t', 'think', 'twice']
+    assert tokens.counter()['love'] == 1
@@ -0,0 +1,37 @@
+# Imports go here
+import pandas as pd
+
+from scripts import tokenizer as tk
+
+
+lyrics = pd.Series(
+    [' The rain and the road ', ' Die Straße und der Regen ', ''],
+    index=pd.Index(['a.txt', 'b.txt', 'c.txt'], name='File')
+)
+
+
+def test_split():
+    words = tk.Tokenizer().split(lyrics)
+
+    assert list(words.index) == list(lyrics.index)
+    assert words.tolist() == [
+        ['the', 'rain', 'and', 'the', 'road'],
+        ['die', 'straße', 'und', 'der', 'regen'],
+        []
+    ]
+
+def test_split_parallel(monkeypatch):
+    monkeypatch.setattr(tk, 'parallel_songs', 2)
+    monkeypatch.setattr(tk, 'batch_songs', 2)
+    words = tk.Tokenizer(workers=2).split(lyrics)
+
+    assert words.equals(tk.split_batch(lyrics))
+
+def test_stop_words():
+    # Stop word sets are loaded once per language
+    assert tk.stop_words('english') is tk.stop_words('english')
+    assert tk.stop_words(None) == set()
+
+    assert tk.Tokenizer('english').words(lyrics[:1], exclude=True) == ['rain', 'road']
+    assert tk.get_tokenizer('german').words(lyrics[1:2], exclude=True) == ['straße', 'regen']
+    assert tk.get_tokenizer('german') is tk.get_tokenizer('german')
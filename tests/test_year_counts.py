@@ -0,0 +1,60 @@
+# Imports go here
+import pandas as pd
+
+from scripts.token_store import build_tokens
+from scripts.year_counts import YearCountsBuilder, build_year_counts
+
+
+df = pd.DataFrame({
+    'ReleaseDate': pd.to_datetime(['1965-08-30', '1975-01-20', '1965-03-22']),
+    'Lyrics': [' the rain and the road ', ' rain rain tangled ', ' road road the end ']
+}, index=pd.Index(['a.txt', 'b.txt', 'c.txt'], name='File'))
+
+
+def test_build_year_counts():
+    year_counts = build_year_counts(df, build_tokens(df['Lyrics']), {'the', 'and'})
+
+    assert year_counts.years == ['1965', '1975']
+    assert list(year_counts.totals) == [5, 3]
+    assert year_counts.top_words('overall', 2) == [('rain', 3), ('road', 3)]
+    assert year_counts.top_words('1975', 5) == [('rain', 2), ('tangled', 1)]
+    assert list(year_counts.column('rain')) == [1, 2]
+    assert list(year_counts.share('unknown')) == [0, 0]
+
+def test_shares():
+    year_counts = build_year_counts(df, build_tokens(df['Lyrics']), {'the', 'and'})
+    shares = year_counts.shares(['road', 'rain'])
+
+    assert list(shares['Year']) == ['1965', '1965', '1975', '1975']
+    assert list(shares['Word']) == ['road', 'rain', 'road', 'rain']
+    assert list(shares['Frequency'].round(1)) == [60.0, 20.0, 0.0, 66.7]
+
+def test_columns():
+    year_counts = build_year_counts(df, build_tokens(df['Lyrics']), {'the', 'and'})
+
+    assert year_counts.columns(['road', 'unknown', 'rain']).tolist() == [[3, 0, 1], [0, 0, 2]]
+    assert year_counts.column_shares(['rain'])[:, 0].tolist() == list(year_counts.share('rain'))
+
+def test_builder_chunks():
+    tokens = build_tokens(df['Lyrics'])
+    builder = YearCountsBuilder()
+    for i in range(len(df)):
+        builder.add(df.iloc[i:i + 1], tokens)
+    chunked = builder.result(tokens.vocab)
+    whole = build_year_counts(df, tokens)
+
+    assert chunked.years == whole.years
+    assert list(chunked.indptr) == list(whole.indptr)
+    assert list(chunked.data) == list(whole.data)
+
+def test_word_index():
+    year_counts = build_year_counts(df, build_tokens(df['Lyrics']))
+    indptr, rows, data = year_counts.word_index()
+
+    # Every word points at its years and counts
+    assert indptr[-1] == len(year_counts.data)
+    for word in ['the', 'rain', 'road', 'end', 'tangled']:
+        i = year_counts.lookup[word]
+        counts = dict(zip(rows[indptr[i]:indptr[i + 1]], data[indptr[i]:indptr[i + 1]]))
+        assert [counts.get(row, 0) for row in range(2)] == list(year_counts.columns([word])[:, 0])
+    assert list(year_counts.column('the')) == [3, 0]